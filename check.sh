@@ -3,4 +3,4 @@
 set -e
 
 echo '[+] Running checks...'
-python3 scripts/check-lists.py
+python3 scripts/check-lists.py "$@"
@@ -0,0 +1,241 @@
+"""
+Benchmarks backing the build's performance work, each comparing the current
+implementation with the one it replaced (kept here as a reference). Run from
+the repository root, e.g. `python3 scripts/benchmarks.py decoders`.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from dataclasses import astuple, dataclass, fields, is_dataclass, replace
+from types import SimpleNamespace
+
+from coin_gecko import Coin as CoinGeckoCoin, CoinInfo
+from common_classes import Asset, Token, build_dataclass_from_dict
+from utils import CardanoFingerprints, encode_cardano_fingerprint, read_json
+
+
+def best_of(f, rounds: int = 5) -> float:
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def random_hex(rng: random.Random, size: int) -> str:
+    return rng.randbytes(size).hex()
+
+
+def reflective_build_dataclass_from_dict(cls, dict_):
+    # build_dataclass_from_dict before per-class decoders: fields are
+    # reflected upon for every object
+    class_fields = {f.name: f.type for f in fields(cls)}
+    init_args = {}
+    for key, value in dict_.items():
+        if key in class_fields:
+            field_type = class_fields[key]
+            if is_dataclass(field_type):
+                init_args[key] = reflective_build_dataclass_from_dict(field_type, value)
+            elif isinstance(value, list) and is_dataclass(field_type[0]):
+                init_args[key] = [reflective_build_dataclass_from_dict(field_type[0], item) for item in value]
+            elif isinstance(value, dict) and is_dataclass(field_type.__args__[1]):
+                init_args[key] = {k: reflective_build_dataclass_from_dict(field_type.__args__[1], v)
+                                  for k, v in value.items()}
+            else:
+                init_args[key] = value
+    return cls(**init_args)
+
+
+def coins_list_payload(count: int, rng: random.Random) -> list[dict]:
+    # Shaped like /coins/list?include_platform=true
+    platforms = ["ethereum", "binance-smart-chain", "polygon-pos", "solana", "base", "arbitrum-one"]
+    return [{
+        'id': f"coin-{i}",
+        'symbol': f"c{i}",
+        'name': f"Coin {i}",
+        'platforms': {platform: "0x" + random_hex(rng, 20) for platform in rng.sample(platforms, rng.randint(0, 3))},
+    } for i in range(count)]
+
+
+def coin_info_payload(count: int, rng: random.Random) -> list[dict]:
+    # Shaped like /coins/{id}, as stored in the coin info cache
+    payload = []
+    for i in range(count):
+        platforms = {platform: "0x" + random_hex(rng, 20) for platform in ["ethereum", "base"]}
+        payload.append({
+            'id': f"coin-{i}",
+            'symbol': f"c{i}",
+            'name': f"Coin {i}",
+            'platforms': platforms,
+            'detail_platforms': {platform: {'decimal_place': 18, 'contract_address': address}
+                                 for platform, address in platforms.items()},
+            'description': {'en': "A coin. " * 20},
+            'links': {'homepage': [f"https://coin-{i}.example"], 'whitepaper': ""},
+            'image': {size: f"https://coin-{i}.example/{size}.png" for size in ["thumb", "small", "large"]},
+            'market_data': {name: {currency: rng.random() * 1e6 for currency in ["usd", "eur", "btc"]}
+                            for name in ["current_price", "market_cap", "total_volume"]},
+        })
+    return payload
+
+
+def benchmark_decoders(coins_list: str = None, rounds: int = 5):
+    rng = random.Random(0)
+    if coins_list:
+        coins_list_name, coins = coins_list, read_json(coins_list)
+    else:
+        coins_list_name, coins = "synthetic coins/list", coins_list_payload(16000, rng)
+    cases = [
+        ("Token", Token, "erc20-tokens.json", read_json("erc20-tokens.json")),
+        ("Coin", CoinGeckoCoin, coins_list_name, coins),
+        ("CoinInfo", CoinInfo, "synthetic /coins/{id}", coin_info_payload(5000, rng)),
+    ]
+
+    print(f"{'Class':<9} {'Objects':>7}  {'Reflective':>10}  {'Decoder':>8}  Source")
+    for name, cls, source, payload in cases:
+        # The results have to be the same, for the timings to mean anything
+        # (field by field, as Token equality only compares addresses)
+        assert [astuple(build_dataclass_from_dict(cls, x)) for x in payload] == \
+               [astuple(reflective_build_dataclass_from_dict(cls, x)) for x in payload]
+        reflective = best_of(lambda: [reflective_build_dataclass_from_dict(cls, x) for x in payload], rounds)
+        decoder = best_of(lambda: [build_dataclass_from_dict(cls, x) for x in payload], rounds)
+        print(f"{name:<9} {len(payload):>7}  {reflective * 1000:>8.1f}ms  {decoder * 1000:>6.1f}ms  "
+              f"{source} ({reflective / decoder:.1f}x)")
+
+
+@dataclass
+class UnslottedToken:
+    # Token before slots, interning, the precompiled symbol pattern and in
+    # place transforms
+    address: str
+    decimals: int
+    displaySymbol: str
+    logo: str
+    name: str
+    symbol: str
+    website: str
+
+    should_append_network_suffix = Token.should_append_network_suffix
+
+    def is_valid(self):
+        return re.match("^[a-zA-Z0-9]{1,8}$", self.symbol) is not None
+
+    @staticmethod
+    def from_asset(asset, chain):
+        return UnslottedToken(
+            address=asset.id,
+            decimals=asset.decimals,
+            displaySymbol=asset.displaySymbol or asset.symbol,
+            logo=Token.build_token_logo(asset.id, chain),
+            name=asset.name,
+            symbol=asset.symbol,
+            website=asset.website
+        )
+
+    def uppercase(self):
+        return replace(self, symbol=self.symbol.upper())
+
+    def with_suffix(self, network):
+        if self.should_append_network_suffix(network):
+            return replace(self, symbol=f"{self.symbol}.{network.symbol}")
+        return self
+
+    def without_suffix(self, network):
+        return replace(self, symbol=self.symbol.removesuffix(f".{network.symbol}"))
+
+
+def token_pipeline(token_cls, assets: list[Asset], network) -> list:
+    # The passes build_tokens_list makes over every token, each one keeping
+    # the previous list alive until the next is built
+    tokens = [token_cls.from_asset(asset, network.chain) for asset in assets]
+    tokens = [token for token in tokens if token.is_valid()]
+    tokens = [token.uppercase() for token in tokens]
+    tokens = [token.with_suffix(network) for token in tokens]
+    return [token.without_suffix(network) for token in tokens]
+
+
+def synthetic_assets(count: int, rng: random.Random) -> list[Asset]:
+    # Round-tripped through JSON so that equal strings are separate objects,
+    # as they are when read from info.json files
+    symbols = [f"tk{i}" for i in range(count // 50)]
+    raw = [{'id': "0x" + random_hex(rng, 20), 'decimals': 18, 'name': f"Token {i}", 'symbol': rng.choice(symbols),
+            'status': "active", 'website': f"https://token-{i}.example"} for i in range(count)]
+    return [Asset.from_dict(x) for x in json.loads(json.dumps(raw))]
+
+
+def benchmark_models(count: int = 100_000, rounds: int = 3):
+    network = SimpleNamespace(chain="ethereum", symbol="SOL")
+    assets = synthetic_assets(count, random.Random(0))
+    assert list(map(astuple, token_pipeline(Token, assets, network))) == \
+           list(map(astuple, token_pipeline(UnslottedToken, assets, network)))
+
+    print(f"{count} assets through from_asset, is_valid, uppercase and suffix round trips")
+    print(f"{'Model':<9} {'Peak':>9}  {'Retained':>9}  {'Time':>8}")
+    for name, token_cls in [("Unslotted", UnslottedToken), ("Token", Token)]:
+        gc.collect()
+        tracemalloc.start()
+        tokens = token_pipeline(token_cls, assets, network)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del tokens
+        elapsed = best_of(lambda: token_pipeline(token_cls, assets, network), rounds)
+        print(f"{name:<9} {peak / 2 ** 20:>6.1f}MiB  {retained / 2 ** 20:>6.1f}MiB  {elapsed * 1000:>6.0f}ms")
+
+
+def benchmark_fingerprints(count: int = 100_000):
+    rng = random.Random(0)
+    asset_ids = [(random_hex(rng, 28), random_hex(rng, rng.randint(0, 16))) for _ in range(count)]
+
+    start = time.perf_counter()
+    expected = {asset_id: encode_cardano_fingerprint(*asset_id) for asset_id in asset_ids}
+    uncached = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "cardano-fingerprints.pickle")
+        fingerprints = CardanoFingerprints(path)
+        timings = []
+        # Cold (computed and saved), memoized in the same process, then
+        # loaded from the disk cache as a new run would
+        for get_fingerprints in [lambda: fingerprints, lambda: fingerprints, lambda: CardanoFingerprints(path)]:
+            start = time.perf_counter()
+            assert get_fingerprints().fingerprints(asset_ids) == expected
+            timings.append(time.perf_counter() - start)
+        cache_size = os.path.getsize(path)
+
+    cold, memoized, reloaded = timings
+    print(f"{count} synthetic Cardano assets")
+    print(f"Uncached:  {uncached:.2f}s")
+    print(f"Cold:      {cold:.2f}s (including writing {cache_size} bytes of cache)")
+    print(f"Memoized:  {memoized:.2f}s")
+    print(f"Reloaded:  {reloaded:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    decoders = subparsers.add_parser('decoders', help="per-class decoders vs reflective dataclass construction")
+    decoders.add_argument('--coins-list', metavar='FILE',
+                          help="a captured /coins/list?include_platform=true response (default: synthetic)")
+    models = subparsers.add_parser('models', help="memory and time of the token passes, tracemalloc based")
+    models.add_argument('--count', type=int, default=100_000, help="number of synthetic assets (default: 100000)")
+    fingerprints = subparsers.add_parser('fingerprints', help="memoized vs computed Cardano fingerprints")
+    fingerprints.add_argument('--count', type=int, default=100_000, help="number of synthetic assets (default: 100000)")
+    args = parser.parse_args()
+
+    if args.benchmark == 'decoders':
+        benchmark_decoders(args.coins_list)
+    elif args.benchmark == 'models':
+        benchmark_models(args.count)
+    elif args.benchmark == 'fingerprints':
+        benchmark_fingerprints(args.count)
+
+
+if __name__ == '__main__':
+    main()
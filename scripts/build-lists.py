@@ -1,18 +1,31 @@
 import argparse
+import asyncio
+import contextlib
 import glob
+import io
 import itertools
 import json
+import os
 import sys
-from dataclasses import asdict, replace
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
 from urllib.parse import urljoin
 
-from coin_gecko import fetch_coin_prices, fetch_token_prices, fetch_coin_descriptions, fetch_token_descriptions, fetch_missing_tokens_for_network, get_coin_by_chain_and_address
-from common_classes import Asset, Blockchain, Coin, Token
+from coin_gecko import fetch_prices_pipelined, fetch_coin_descriptions, fetch_token_descriptions, fetch_missing_tokens_for_network, get_coin_by_chain_and_address, \
+    get_coin_index, CoinGeckoAPIClient, DescriptionJournal, DescriptionCleaner
+from common_classes import Asset, Blockchain, Coin, Token, logo_resolver
+from duplicates import SymbolIndex, find_duplicates
+from git_changes import find_affected_lists
+from parse_cache import get_parse_cache, loaded_parse_cache
+from price_store import get_price_store, record_price_history
+from snapshot import write_snapshot
+from timings import get_timings
 from statics import BLOCKCHAINS, EXT_BLOCKCHAINS_DENYLIST, EXT_BLOCKCHAINS, EXT_PRICES, FINAL_BLOCKCHAINS_LIST, \
-    NETWORKS, EXT_OVERRIDES
+    NETWORKS, EXT_OVERRIDES, DESCRIPTIONS_TEXT, DESCRIPTIONS_INFO, CUSTODY_LIST, SNAPSHOT_FILE
 
-from utils import filter_cardano_tokens_by_price
+from utils import filter_cardano_tokens_by_price, positive_int
 
 def read_json(path, comment_marker=None):
     with open(path) as json_file:
@@ -31,15 +44,47 @@ def read_txt(path):
         return lines
 
 
+def iter_json(data, sort_keys=True, indent=4):
+    """
+    Same output as json.dump(data, sort_keys=sort_keys, indent=indent), but
+    encoding one top-level entry at a time. Lists may be given as any iterable.
+    """
+    if isinstance(data, dict):
+        open_bracket, close_bracket = "{", "}"
+        keys = sorted(data) if sort_keys else data
+        entries = (f"{json.dumps(key)}: {json.dumps(data[key], sort_keys=sort_keys, indent=indent)}" for key in keys)
+    else:
+        open_bracket, close_bracket = "[", "]"
+        entries = (json.dumps(entry, sort_keys=sort_keys, indent=indent) for entry in data)
+
+    newline = "\n" + " " * indent
+    first = True
+    for entry in entries:
+        yield (open_bracket if first else ",") + newline + entry.replace("\n", newline)
+        first = False
+    yield (open_bracket + close_bracket) if first else ("\n" + close_bracket)
+
+
 def write_json(data, path, sort_keys=True, indent=4):
-    with open(path, "w") as json_file:
-        return json.dump(data, json_file, sort_keys=sort_keys, indent=indent)
+    # Written to a temporary file first, so that an interrupted run never leaves
+    # a half-written output behind
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as json_file:
+            for chunk in iter_json(data, sort_keys=sort_keys, indent=indent):
+                json_file.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def multiread_json(base_dir, pattern, comment_marker=None):
+    parse_cache = get_parse_cache()
     for target in sorted(glob.glob(base_dir + pattern)):
         key = target.replace(base_dir, '').partition("/")[0]
-        yield key, read_json(target, comment_marker=comment_marker)
+        yield key, parse_cache.read_json(target, comment_marker=comment_marker)
 
 
 def read_assets(assets_dir):
@@ -50,19 +95,75 @@ def read_blockchains(blockchains_dir, comment_marker=None):
     yield from multiread_json(blockchains_dir, "/*/info/info.json", comment_marker)
 
 
-def find_duplicates(items, key, post_filter=None):
-    groups = itertools.groupby(sorted(items, key=key), key)
-    groups = [(symbol, list(items)) for symbol, items in groups]
-    if post_filter:
-        return [(symbol, list(filter(post_filter, items))) for symbol, items in groups if len(items) > 1]
-    return [(symbol, items) for symbol, items in groups if len(items) > 1]
+class DescriptionIndex:
+    """Entries of description/info.json, indexed by symbol (first entry wins)."""
+
+    def __init__(self, descriptions):
+        self.descriptions = descriptions
+        self.by_symbol = {}
+        for description in descriptions:
+            self.by_symbol.setdefault(description['symbol'], description)
+
+    def get(self, symbol):
+        return self.by_symbol.get(symbol)
+
+    def add(self, description):
+        self.descriptions.append(description)
+        self.by_symbol.setdefault(description['symbol'], description)
+
+    def sorted(self):
+        return sorted(self.descriptions, key=lambda x: x['symbol'])
+
+
+_description_index = None
+
+
+def get_description_index():
+    # Parsed once per process and shared by every network pass
+    global _description_index
+    if _description_index is None:
+        _description_index = DescriptionIndex(read_json(DESCRIPTIONS_INFO))
+    return _description_index
+
+
+class BuildContext:
+    """
+    Inputs shared by every network's token list build, loaded once per process.
+    Workers forked after load() inherit them as they are.
+    """
+
+    def __init__(self):
+        self.price_store = None
+        self.description_index = None
+        self.coins = None
+
+    def load(self):
+        if self.price_store is not None and self.coins is not None:
+            return self
+        with get_timings().measure("load shared inputs"):
+            self.price_store = get_price_store()
+            self.description_index = get_description_index()
+            if self.coins is None:
+                # Ethereum tokens are checked against coins, as they have no suffix
+                self.coins = list(map(lambda x: Coin.from_dict(x), read_json(FINAL_BLOCKCHAINS_LIST)))
+        return self
+
+
+_build_context = None
+
+
+def get_build_context():
+    global _build_context
+    if _build_context is None:
+        _build_context = BuildContext()
+    return _build_context
 
 
 def get_duplicates_lines(duplicates, network) -> list[str]:
     lines: list[str] = []
-    for symbol, tokens in duplicates:
-        lines.append(f"# '{symbol}' is shared by:")
-        for token in tokens:
+    for collision in duplicates:
+        lines.append(f"# '{collision.symbol}' is shared by:")
+        for token in collision.entries:
             lines.append(f"# {token.address}")
             lines.append(f"# - Website: {token.website}")
             lines.append(f"# - Explorer: {urljoin(network.explorer_url, token.address)} ({token.name})")
@@ -107,10 +208,10 @@ def fetch_coins():
     # Convert to Coin instances:
     coins = list(map(Coin.from_chain, chains))
 
-    duplicates = find_duplicates(coins, lambda c: c.symbol.lower())
+    duplicates = find_duplicates(coins)
 
     if duplicates:
-        raise Exception(f"Duplicates found: {duplicates}")
+        raise Exception(f"Duplicates found: {'; '.join(map(str, duplicates))}")
 
     return list(coins)
 
@@ -136,41 +237,52 @@ def fetch_prices():
     # symbol collisions (e.g. multiple chains using ETH) that would abort CI.
     coins = list(map(Coin.from_dict, read_json(FINAL_BLOCKCHAINS_LIST)))
 
+    # Make sure worker threads share a single parse cache
+    get_parse_cache()
+
     prices = {
         "timestamp": datetime.now().isoformat(),
-        "prices": fetch_coin_prices(coins)
+        "prices": asyncio.run(fetch_prices_pipelined(coins, NETWORKS, fetch_tokens))
     }
 
-    for network in NETWORKS:
-        tokens = fetch_tokens(network.chain)
-        all_token_prices = fetch_token_prices(network, tokens)
-        # TrustWallet symbols aren't unique, so we key tokens by {address}.{network} to track token prices correctly.
-        price_per_address = {(token.address + '.' + network.symbol): amount for token, amount in all_token_prices.items()}
-        prices["prices"].update(price_per_address)
+    # Keep a rolling history of the quotes that changed since the last fetch
+    price_store = get_price_store()
+    changed = price_store.update(prices["timestamp"], prices["prices"])
+    print(f"{sum(map(len, changed.values()))} quotes changed in {len(changed)} networks")
+    record_price_history(price_store, changed)
 
     print(f"Writing coin prices to {EXT_PRICES}")
 
-    write_json(prices, EXT_PRICES)
+    write_json(price_store.to_prices_json(), EXT_PRICES)
 
 
 def build_coins_list():
-    coins = list(map(asdict, fetch_coins()))
+    with get_timings().measure("coins list"):
+        coins = fetch_coins()
+
+        print(f"Writing {len(coins)} coins to {FINAL_BLOCKCHAINS_LIST}")
+        write_json(map(asdict, coins), FINAL_BLOCKCHAINS_LIST, sort_keys=False, indent=2)
 
-    print(f"Writing {len(coins)} coins to {FINAL_BLOCKCHAINS_LIST}")
-    write_json(coins, FINAL_BLOCKCHAINS_LIST, sort_keys=False, indent=2)
+    # No need to read them back for the Ethereum tokens list
+    get_build_context().coins = coins
 
 
 def merge_token_lists(existing_tokens: list[Token], new_tokens: list[Token], coins: list[Coin]) -> list[Token]:
     merged_list = existing_tokens
-    # Map containing existing symbol to make sure our symbols are uniques
-    existing_tokens_symbol_map = {token.symbol.lower(): True for token in existing_tokens}
+    # Existing symbols, to make sure our symbols are uniques
+    symbol_index = SymbolIndex()
+    symbol_index.add_all(existing_tokens)
 
     # For Ethereum, we also need to add coins as there is no suffix on ETH tokens
-    for coin in coins:
-        existing_tokens_symbol_map[coin.symbol.lower()] = True
+    symbol_index.add_all(coins)
+
+    # Position of each address in the merged list (first occurrence wins)
+    index_by_address = {}
+    for i, token in enumerate(merged_list):
+        index_by_address.setdefault(token.address.lower(), i)
 
     for new_token in new_tokens:
-        found_token_index = next((i for i, t in enumerate(merged_list) if t.address.lower() == new_token.address.lower()), None)
+        found_token_index = index_by_address.get(new_token.address.lower())
 
         # Token already existing, we need to update it (except for symbol that is immutable)
         if found_token_index is not None:
@@ -181,138 +293,243 @@ def merge_token_lists(existing_tokens: list[Token], new_tokens: list[Token], coi
         base_new_symbol = new_token.symbol
         suffix = 2
         # We make sure that there is no symbol collision and use a number prefix if there is
-        while new_token.symbol.lower() in existing_tokens_symbol_map:
+        while new_token.symbol.lower() in symbol_index:
             new_token.symbol = f"{base_new_symbol}{suffix}"
             suffix += 1
 
-        # We add the new token into the map
-        existing_tokens_symbol_map[new_token.symbol.lower()] = True
+        # We add the new token into the indexes
+        symbol_index.add(new_token)
+        index_by_address[new_token.address.lower()] = len(merged_list)
         merged_list.append(new_token)
     return sorted(merged_list, key=lambda t: t.address)
 
 
 def build_tokens_list(network, fill_from_coingecko=False, ci=False):
+    context = get_build_context().load()
+    timings = get_timings()
     print(f"Generating token files for network \"{network.chain}\"")
-    tokens = fetch_tokens(network.chain)
+    with timings.measure("read assets", network.chain):
+        tokens = fetch_tokens(network.chain)
 
     print(f"Reading {network.symbol} token prices from {EXT_PRICES}")
-    prices = read_json(EXT_PRICES)
+    price_store = context.price_store
 
     print(f"Tokens before price filter {len(tokens)}")
 
     # Clean up by price:
-    if network.symbol.lower() == 'ada':
-        tokens = filter_cardano_tokens_by_price(tokens, prices)
-    else:
-        tokens = list(filter(lambda token: (token.address + "." + network.symbol) in prices['prices'], tokens))
+    with timings.measure("price filter", network.chain):
+        if network.symbol.lower() == 'ada':
+            tokens = filter_cardano_tokens_by_price(tokens, price_store.network_prices(network.symbol))
+        else:
+            tokens = list(filter(lambda token: price_store.has_token(token.address, network.symbol), tokens))
 
     print(f"Tokens after price filter {len(tokens)}")
 
     # Optionally, fetch tokens from CoinGecko, adding to the current list
     if fill_from_coingecko:
-        print(f"Fetching missing tokens from CoinGecko")
-        new_tokens = fetch_missing_tokens_for_network(network, tokens)
-        print(f"Adding {len(new_tokens)} tokens fetched from CoinGecko")
-        tokens += new_tokens
-
-    # Make sure the asset is NOT in the denylist:
-    deny_path = f"extensions/blockchains/{network.chain}/denylist.txt"
-    bc_denylist = set(map(lambda x: x.lower(), read_txt(deny_path)))
-    tokens = filter(lambda x: x.address.lower() not in bc_denylist, tokens)
-
-    # Make sure the asset is valid:
-    tokens = filter(lambda x: x.is_valid(), tokens)
-
-    # Merge with extensions:
-    extensions_path = f"extensions/blockchains/{network.chain}/assets/"
-    print(f"Reading {network.symbol} asset extensions from {extensions_path}")
-    extensions = [Asset.from_dict(info) for key, info in read_assets(extensions_path)]
-    extensions = map(lambda ext: Token.from_asset(ext, network.chain), extensions)
-    tokens = sorted(set(extensions) | set(tokens), key=lambda t: t.address)
-
-    # We make sure all new tokens are uppercase
-    tokens = [replace(t, symbol=t.symbol.upper()) for t in tokens]
-
-    print(f"Reading existing assets in {network.output_file}")
-    current_tokens = list(
-        map(lambda x: Token(**x).without_suffix(network), read_json(network.output_file)))
-
-    # For Ethereum, we need to fetch the coins as well because ETH tokens don't have suffix
-    extras = list(map(lambda x: Coin.from_dict(x), read_json("coins.json"))) if network.chain == 'ethereum' else []
-
-    # We get the final tokens list by merging existing ones and fetched ones
-    if ci:
-        tokens = merge_token_lists(existing_tokens=current_tokens, new_tokens=tokens, coins=extras)
-    else:
-        tokens = list(set(tokens) | set(current_tokens))
+        with timings.measure("coingecko fill", network.chain):
+            print(f"Fetching missing tokens from CoinGecko")
+            new_tokens = fetch_missing_tokens_for_network(network, tokens)
+            print(f"Adding {len(new_tokens)} tokens fetched from CoinGecko")
+            tokens += new_tokens
+
+    with timings.measure("filter and merge extensions", network.chain):
+        # Make sure the asset is NOT in the denylist:
+        deny_path = f"extensions/blockchains/{network.chain}/denylist.txt"
+        bc_denylist = set(map(lambda x: x.lower(), read_txt(deny_path)))
+        tokens = filter(lambda x: x.address.lower() not in bc_denylist, tokens)
+
+        # Make sure the asset is valid:
+        tokens = filter(lambda x: x.is_valid(), tokens)
+
+        # Merge with extensions:
+        extensions_path = f"extensions/blockchains/{network.chain}/assets/"
+        print(f"Reading {network.symbol} asset extensions from {extensions_path}")
+        extensions = [Asset.from_dict(info) for key, info in read_assets(extensions_path)]
+        extensions = map(lambda ext: Token.from_asset(ext, network.chain), extensions)
+        tokens = sorted(set(extensions) | set(tokens), key=lambda t: t.address)
+
+        # We make sure all new tokens are uppercase
+        tokens = [t.uppercase() for t in tokens]
+
+    with timings.measure("merge existing", network.chain):
+        print(f"Reading existing assets in {network.output_file}")
+        current_tokens = list(
+            map(lambda x: Token(**x).without_suffix(network), read_json(network.output_file)))
+
+        # For Ethereum, we need the coins as well because ETH tokens don't have suffix
+        extras = context.coins if network.chain == 'ethereum' else []
+
+        # We get the final tokens list by merging existing ones and fetched ones
+        if ci:
+            tokens = merge_token_lists(existing_tokens=current_tokens, new_tokens=tokens, coins=extras)
+        else:
+            tokens = list(set(tokens) | set(current_tokens))
 
     # Look for duplicates:
     # For ethereum we also check collisions with coins as ethereum tokens does not have suffixes
-
-    duplicates = find_duplicates(tokens + extras, lambda t: t.symbol.lower(), lambda t: isinstance(t, Token))
+    with timings.measure("dedupe", network.chain):
+        symbol_index = SymbolIndex()
+        symbol_index.add_all(tokens, network.output_file)
+        symbol_index.add_all(extras, FINAL_BLOCKCHAINS_LIST)
+        duplicates = symbol_index.collisions(lambda t: isinstance(t, Token))
     if duplicates:
         if ci:
             # We should not have duplicates n ci mode
             print(f"Found {len(duplicates)} duplicate tokens in ci mode, Aborting")
-            print(duplicates)
+            for collision in duplicates:
+                print(collision)
             sys.exit(1)
         else:
             dump_duplicates(duplicates, network)
             return
 
-    # Add network suffix before final dump:
-    tokens = map(lambda token: token.with_suffix(network), tokens)
-
-    # We clean names
-    tokens = map(lambda token: token.clean_name(), tokens)
-
-    # Convert back to plain dicts:
-    tokens = list(map(asdict, tokens))
-
-    print(f"Writing {len(tokens)} tokens to {network.output_file}")
-
-    # MON-1735: Enrich tokens with description overrides (websiteUrl)
-    info = read_json('./description/info.json')
-    for token in tokens:
-        found_info = next((t for t in info if t['symbol'] == token['symbol']), None)
-        if found_info is not None and found_info.get('websiteurl'):
-            token['website'] = found_info['websiteurl']
+    with timings.measure("enrich and write", network.chain):
+        # Add network suffix before final dump:
+        tokens = map(lambda token: token.with_suffix(network), tokens)
+
+        # We clean names
+        tokens = map(lambda token: token.clean_name(), tokens)
+
+        tokens = sorted(tokens, key=lambda t: t.address)
+
+        print(f"Writing {len(tokens)} tokens to {network.output_file}")
+
+        # MON-1735: Enrich tokens with description overrides (websiteUrl)
+        description_index = context.description_index
+
+        def enriched_dicts():
+            # Converted back to plain dicts one at a time, as they're written
+            for token in tokens:
+                token_dict = asdict(token)
+                found_info = description_index.get(token_dict['symbol'])
+                if found_info is not None and found_info.get('websiteurl'):
+                    token_dict['website'] = found_info['websiteurl']
+                yield token_dict
+
+        write_json(enriched_dicts(), network.output_file)
+
+
+def build_tokens_list_captured(network, fill_from_coingecko=False, ci=False):
+    # Runs in a worker process: keep the log, the timings and the failure (if
+    # any) so that the parent can report them in network order.
+    output = io.StringIO()
+    error = None
+    timings = get_timings()
+    with contextlib.redirect_stdout(output):
+        try:
+            build_tokens_list(network, fill_from_coingecko, ci)
+        except SystemExit as e:
+            if e.code:
+                error = f"Exited with status {e.code}"
+        except Exception:
+            error = traceback.format_exc()
+        parse_cache = get_parse_cache()
+        print(parse_cache.stats())
+        print(logo_resolver.stats())
+        # Worker processes are reused across networks
+        parse_cache.reset_stats()
+        logo_resolver.reset_stats()
+    timing_entries = timings.entries
+    timings.reset()
+    # Saved by the parent, rather than rewriting the cache after each network
+    return output.getvalue(), error, timing_entries, parse_cache.take_updated()
+
+
+def init_tokens_list_worker(jobs):
+    # Forked workers start with a copy of the parent's state: the CoinGecko
+    # rate limit is split between them, and the timings and stats they report
+    # only cover what they do themselves
+    CoinGeckoAPIClient.share_rate_limit(jobs)
+    get_timings().reset()
+    if loaded_parse_cache() is not None:
+        loaded_parse_cache().reset_stats()
+    logo_resolver.reset_stats()
+
+
+def build_tokens_lists(networks, fill_from_coingecko=False, ci=False, jobs=1):
+    # Shared inputs are loaded before forking, so workers don't load them again
+    get_build_context().load()
+
+    if jobs <= 1:
+        for network in networks:
+            build_tokens_list(network, fill_from_coingecko, ci)
+        return
 
-    write_json(sorted(tokens, key=lambda x: x['address']), network.output_file)
-
-
-def fill_descriptions_from_overrides():
-    text_descriptions = read_json('./description/en.json')
-    descriptions_list = read_json('./description/info.json')
-    descriptions_overrides = read_json(EXT_OVERRIDES)['descriptions']
-    website_urls_overrides = read_json(EXT_OVERRIDES)['website_urls']
+    if fill_from_coingecko:
+        # Also loaded before forking, or each worker would download coins/list itself
+        get_coin_index()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_tokens_list_worker, initargs=(jobs,)) as executor:
+        futures = [executor.submit(build_tokens_list_captured, network, fill_from_coingecko, ci)
+                   for network in networks]
+        for network, future in zip(networks, futures):
+            output, error, timing_entries, parse_cache_updates = future.result()
+            sys.stdout.write(output)
+            get_timings().merge(timing_entries)
+            get_parse_cache().merge(parse_cache_updates)
+            if error:
+                # Stop at the first failure, as the serial build does. Networks
+                # already being built still finish, the others aren't started.
+                executor.shutdown(cancel_futures=True)
+                sys.exit(f"Failed to build token list for network \"{network.chain}\":\n{error}")
+
+
+def build_snapshot():
+    # Built from the written lists, so it matches them even when only some were rebuilt
+    with get_timings().measure("snapshot"):
+        coins = read_json(FINAL_BLOCKCHAINS_LIST)
+        tokens_by_network = {network.symbol: read_json(network.output_file) for network in NETWORKS}
+        custody = read_json(CUSTODY_LIST)
+
+        print(f"Writing snapshot of {len(coins)} coins, {sum(map(len, tokens_by_network.values()))} tokens "
+              f"and {len(custody)} custody currencies to {SNAPSHOT_FILE}")
+        write_snapshot(SNAPSHOT_FILE, coins, tokens_by_network, custody)
+
+
+def fill_descriptions_from_overrides(text_descriptions=None, description_index=None):
+    if text_descriptions is None:
+        text_descriptions = read_json(DESCRIPTIONS_TEXT)
+    if description_index is None:
+        description_index = get_description_index()
+    overrides = read_json(EXT_OVERRIDES)
+    descriptions_overrides = overrides['descriptions']
+    website_urls_overrides = overrides['website_urls']
 
     for symbol, description in descriptions_overrides.items():
         text_descriptions[symbol] = description
-        existing_description = next((desc for desc in descriptions_list if desc['symbol'] == symbol), None)
+        existing_description = description_index.get(symbol)
         if existing_description:
             existing_description['description'] = description
             existing_description['websiteurl'] = website_urls_overrides.get(symbol) or existing_description['websiteurl']
         else:
-            descriptions_list.append({
+            description_index.add({
                 'symbol': symbol,
                 'description': description,
                 'websiteurl': website_urls_overrides.get(symbol) or '',
             })
 
-    write_json(text_descriptions, './description/en.json')
-    write_json(sorted(descriptions_list, key=lambda x: x['symbol']), './description/info.json')
+    write_json(text_descriptions, DESCRIPTIONS_TEXT)
+    write_json(description_index.sorted(), DESCRIPTIONS_INFO)
 
 
-def fetch_descriptions():
+def fetch_descriptions(max_age_hours=24):
+    # Every fetched description is journaled, so a re-run after a crash or a
+    # rate-limit ban only fetches the ids that are missing or stale
+    journal = DescriptionJournal(max_age=max_age_hours * 60 * 60)
+    cleaner = DescriptionCleaner()
+
     coins = list(map(lambda x: Coin.from_dict(x), read_json("coins.json")))
     print(f"Fetching descriptions for {len(coins)} coins")
-    descriptions = fetch_coin_descriptions(coins)
+    descriptions = fetch_coin_descriptions(coins, journal, cleaner)
 
     for network in NETWORKS:
         tokens = list(map(lambda x: Token.from_dict(x), read_json(network.output_file)))
         print(f"Fetching descriptions for {len(tokens)} {network.symbol} tokens")
-        descriptions.update(fetch_token_descriptions(network, tokens))
+        descriptions.update(fetch_token_descriptions(network, tokens, journal, cleaner))
+
+    cleaner.close()
+    print(cleaner.stats())
 
     text_descriptions = {}
     descriptions_list = []
@@ -328,10 +545,9 @@ def fetch_descriptions():
             'websiteurl': description.website,
         })
 
-
-    write_json(text_descriptions, './description/en.json')
-    write_json(sorted(descriptions_list, key=lambda x: x['symbol']), './description/info.json')
-    fill_descriptions_from_overrides()
+    # Apply the overrides on the fetched data directly, without a write/re-read round trip
+    fill_descriptions_from_overrides(text_descriptions, DescriptionIndex(descriptions_list))
+    journal.compact()
 
 
 def main():
@@ -339,21 +555,46 @@ def main():
     parser.add_argument('--ci', action='store_true')
     parser.add_argument('--fetch-prices', action='store_true')
     parser.add_argument('--fetch-descriptions', action='store_true')
+    parser.add_argument('--descriptions-max-age', type=float, default=24, metavar='HOURS',
+                        help="re-use descriptions fetched less than HOURS ago (default: 24)")
     parser.add_argument('--fill-descriptions-from-overrides', action='store_true')
     parser.add_argument('--fill-from-coingecko', action='store_true')
+    parser.add_argument('--jobs', type=positive_int, default=1, help="number of networks to build in parallel")
+    parser.add_argument('--since', metavar='GIT_REV', help="only rebuild the lists affected by changes since GIT_REV")
+    parser.add_argument('--timings', action='store_true', help="print the time spent in each build stage")
     args = parser.parse_args()
 
     if args.fetch_prices:
         fetch_prices()
     elif args.fetch_descriptions:
-        fetch_descriptions()
+        fetch_descriptions(args.descriptions_max_age)
     elif args.fill_descriptions_from_overrides:
         fill_descriptions_from_overrides()
     else:
-        if not args.ci:
+        networks = NETWORKS
+        rebuild_coins = not args.ci
+        if args.since:
+            affected = find_affected_lists(args.since, NETWORKS)
+            networks = affected.networks(NETWORKS)
+            rebuild_coins = rebuild_coins and affected.includes_coins()
+            print(f"Changes since {args.since} affect: "
+                  f"{', '.join(([FINAL_BLOCKCHAINS_LIST] if rebuild_coins else []) + [n.output_file for n in networks]) or 'nothing'}")
+        if rebuild_coins:
             build_coins_list()
-        for network in NETWORKS:
-            build_tokens_list(network, args.fill_from_coingecko, args.ci)
+        build_tokens_lists(networks, args.fill_from_coingecko, args.ci, args.jobs)
+        build_snapshot()
+
+    # Modes that never read an asset (e.g. --fetch-descriptions) don't load the cache at all
+    parse_cache = loaded_parse_cache()
+    if parse_cache is not None:
+        parse_cache.save()
+        if parse_cache.hits or parse_cache.revalidated or parse_cache.misses:
+            print(parse_cache.stats())
+    if logo_resolver.lookups:
+        print(logo_resolver.stats())
+    if args.timings:
+        for line in get_timings().report():
+            print(line)
 
 
 if __name__ == '__main__':
@@ -1,14 +1,18 @@
-import hashlib
-import itertools
+import argparse
 import operator
 import os
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from functools import reduce
-from typing import List
+from typing import Callable, List
 
 from common_classes import Coin, Token
-from statics import BC_REPO_ROOT, EXT_PRICES
-from utils import read_json
+from duplicates import SymbolIndex, find_duplicates
+from git_changes import changed_files, changed_json_entries, changed_keys, read_json_at
+from logo_hashes import get_logo_hash_cache
+from statics import BC_REPO_ROOT, EXT_BLOCKCHAINS, EXT_PRICES
+from timings import Timings, get_timings
+from utils import chunks, positive_int, read_json
 
 EXT_FIATS = "extensions/fiats/"
 
@@ -64,19 +68,13 @@ class CustodyCurrency:
     def __str__(self):
         return f"[{self.symbol}, {self.type}]"
 
-    def check(self, ref: Token | Coin, prices: dict[str, float]):
-        yield from self.check_symbol()
-        yield from self.check_precision(ref)
-        yield from self.check_min_confirmations()
-        yield from self.check_price(ref, prices)
-
     def check_symbol(self):
         # Ignore display differences if they match after removing the suffix:
         symbol, _, native = self.symbol.partition(".")
         if symbol != self.displaySymbol:
             yield Warning(self, f"displayed as: {self.displaySymbol}")
 
-    def check_price(self, ref: Token | Coin, prices: dict[str, float]):
+    def check_price(self, ref: Token | Coin, context: "ValidationContext"):
         if self.hwsSettings is None:
             return
 
@@ -86,7 +84,7 @@ class CustodyCurrency:
             return
 
         try:
-            price = get_price_from_ref(ref, prices)
+            price = context.price(ref)
         except Exception as e:
             yield Warning(self, f"No price: {e}")
             return
@@ -153,109 +151,6 @@ class Fiat:
         return BC_REPO_ROOT + self.logo_path()
 
 
-def find_duplicates(items, key):
-    groups = itertools.groupby(sorted(items, key=key), key)
-    groups = [(symbol, list(items)) for symbol, items in groups]
-    return [(symbol, items) for symbol, items in groups if len(items) > 1]
-
-
-def check_logo(coin):
-    if coin.logo is None:
-        yield Warning(coin, "No logo")
-
-
-def check_fiats(fiats: List[Fiat]):
-    duplicates = find_duplicates(fiats, lambda f: f.symbol.upper())
-    for symbol, items in duplicates:
-        yield Error(symbol, f"Duplicate fiat symbol: {items}")
-
-    content_hashes = {}
-    for fiat in fiats:
-        if fiat.symbol.upper() != fiat.symbol:
-            yield Error(fiat, "Contains mix of lower and upper case letters")
-
-        if not isinstance(fiat.decimals, int) or fiat.decimals < 0:
-            yield Error(fiat, f"Invalid decimals: {fiat.decimals}")
-
-        if not fiat.name:
-            yield Error(fiat, "Missing name")
-
-        expected_logo = fiat.expected_logo_url()
-        if fiat.logo != expected_logo:
-            yield Error(fiat, f"Invalid logo URL, expected {expected_logo}")
-
-        logo_path = fiat.logo_path()
-        if not os.path.exists(logo_path):
-            yield Error(fiat, f"Logo file not found: {logo_path}")
-            continue
-
-        with open(logo_path, "rb") as logo_file:
-            digest = hashlib.sha256(logo_file.read()).hexdigest()
-
-        if digest in content_hashes:
-            yield Error(fiat, f"Duplicate logo content (same as {content_hashes[digest]})")
-        else:
-            content_hashes[digest] = fiat.symbol
-
-
-def check_groups(
-        groups: List[Group],
-        custody_currencies: list[CustodyCurrency],
-        prices: dict[str, float],
-        coins_dict: dict[str, Coin],
-        eth_erc20_tokens_dict: dict[str, Token],
-        chains_dict: dict[str, dict[str, Token]]
-):
-    for group in groups:
-        if group.parentSymbol in group.childSymbols:
-            yield Error(group.parentSymbol, f"also present in childSymbols")
-        # This could change but in the meantime that could avoid some mistakes
-        if "." in group.parentSymbol:
-            yield Error(group.parentSymbol, f"dotted parentSymbol not allowed")
-        if len(group.childSymbols) == 0:
-            yield Error(group.parentSymbol, f"empty group")
-
-        dotted_group = next((symbol for symbol in group.childSymbols if "." in symbol), None)
-        if dotted_group:
-            for symbol in group.childSymbols:
-                if group.parentSymbol != symbol.split(".")[0]:
-                    yield Error(symbol, f"expected {group.parentSymbol} prefix")
-
-        all_group_symbols = [group.parentSymbol] + group.childSymbols
-        parent_custody = next(
-            (custody_currency for custody_currency in custody_currencies if
-             custody_currency.symbol == group.parentSymbol), None)
-
-        if parent_custody is None:
-            yield Error(group.parentSymbol, f"defined in groups.json but not in custody.json")
-        ref = load_ref(parent_custody.type, parent_custody.symbol, coins_dict, eth_erc20_tokens_dict, chains_dict)
-        if ref is None:
-            yield Error(group.parentSymbol, f"defined in groups.json but reference not found")
-
-        parent_price = get_price_from_ref(ref, prices)
-
-        if parent_price <= 0:
-            yield Error(group.parentSymbol, f"no price defined")
-        for symbol in all_group_symbols:
-            found_in_custody = next(
-                (custody_currency for custody_currency in custody_currencies if custody_currency.symbol == symbol),
-                None)
-
-            child_ref = load_ref(parent_custody.type, parent_custody.symbol, coins_dict, eth_erc20_tokens_dict, chains_dict)
-
-            if child_ref is None:
-                yield Error(symbol, f"defined in groups.json but reference not found")
-
-            child_price = get_price_from_ref(child_ref, prices)
-
-            if abs(child_price - parent_price) >= 0.01:
-                yield Error(symbol, f"too much price diff between parent and child")
-            if not found_in_custody:
-                yield Error(symbol, f"defined in groups.json but not in custody.json")
-            elif parent_custody.nabuSettings.custodialPrecision != found_in_custody.nabuSettings.custodialPrecision:
-                yield Error(symbol, f"expected same custodialPrecision as part of the same group")
-
-
 def load_ref(
         currency_type: str,
         original_symbol: str,
@@ -285,85 +180,510 @@ def load_ref(
     return ref
 
 
-def get_price_from_ref(
-        ref: Token | Coin,
-        prices: dict[str, float],
-) -> float:
+def get_price_key(ref: Token | Coin) -> str:
     if isinstance(ref, Coin):
-        return prices[ref.symbol]
+        return ref.symbol
     elif isinstance(ref, Token):
         suffix = "ETH"
         fds = ref.symbol.split(".")
         if len(fds) == 2:
             suffix = fds[1]
-        return prices[ref.address + "." + suffix]
+        return ref.address + "." + suffix
     else:
         raise Exception("Unexpected type")
 
 
-def check_currencies(
-        custody_currencies: list[CustodyCurrency],
-        coins: list[Coin],
-        eth_erc20_tokens: list[Token],
-        chains: dict[str, list[Token]],
+def get_price_from_ref(
+        ref: Token | Coin,
         prices: dict[str, float],
-        groups: List[Group]
-):
-    coins_dict = {x.symbol: x for x in coins}
-    eth_erc20_tokens_dict = {x.symbol: x for x in eth_erc20_tokens}
-    chains_dict = {k: {t.symbol: t for t in v} for k, v in chains.items()}
+) -> float:
+    return prices[get_price_key(ref)]
+
+
+class ValidationContext:
+    """
+    Everything the rules check, with the lookups they share built once: custody
+    entries by symbol (first entry wins), references by currency type and
+    symbol, and prices by reference.
+    """
+
+    def __init__(
+            self,
+            custody_currencies: list[CustodyCurrency],
+            coins: list[Coin],
+            eth_erc20_tokens: list[Token],
+            chains: dict[str, list[Token]],
+            prices: dict[str, float],
+            groups: list[Group],
+            fiats: list[Fiat]
+    ):
+        self.custody_currencies = custody_currencies
+        self.prices = prices
+        self.groups = groups
+        self.fiats = fiats
+        self.assets = coins + eth_erc20_tokens + [token for chain_tokens in chains.values() for token in chain_tokens]
+        self.coins_dict = {x.symbol: x for x in coins}
+        self.eth_erc20_tokens_dict = {x.symbol: x for x in eth_erc20_tokens}
+        self.chains_dict = {k: {t.symbol: t for t in v} for k, v in chains.items()}
+
+        self.custody_by_symbol = {}
+        for currency in custody_currencies:
+            self.custody_by_symbol.setdefault(currency.symbol, currency)
+
+        self.refs = {}
+        self.ref_prices = {}
+        self.fiat_logo_owners = None
+        self.fiat_logo_digests = None
+        self.asset_logo_digests = None
+
+    def custody(self, symbol: str) -> CustodyCurrency | None:
+        return self.custody_by_symbol.get(symbol)
+
+    def ref(self, currency_type: str, symbol: str) -> None | Token | Coin:
+        key = (currency_type, symbol)
+        if key not in self.refs:
+            self.refs[key] = load_ref(currency_type, symbol, self.coins_dict, self.eth_erc20_tokens_dict,
+                                      self.chains_dict)
+        return self.refs[key]
+
+    def currency_ref(self, currency: CustodyCurrency) -> None | Token | Coin:
+        return self.ref(currency.type, currency.symbol)
+
+    def price(self, ref: Token | Coin) -> float:
+        # Refs aren't hashable, but they live as long as the context does.
+        # Missing prices raise every time, as get_price_from_ref does.
+        price = self.ref_prices.get(id(ref))
+        if price is None:
+            price = self.ref_prices[id(ref)] = get_price_from_ref(ref, self.prices)
+        return price
+
+    def hash_fiat_logos(self):
+        # The first fiat (in fiat.json order) using each logo content. Missing
+        # logos are left out.
+        if self.fiat_logo_owners is not None:
+            return
+        self.fiat_logo_digests = get_logo_hash_cache().digests(sorted({fiat.logo_path() for fiat in self.fiats}))
+        self.fiat_logo_owners = {}
+        for fiat in self.fiats:
+            digest = self.fiat_logo_digests[fiat.logo_path()]
+            if digest is not None:
+                self.fiat_logo_owners.setdefault(digest, fiat)
+
+    def hash_asset_logos(self):
+        # Logos the coins and tokens point to in this repository
+        if self.asset_logo_digests is not None:
+            return
+        paths = {get_local_logo_path(asset.logo) for asset in self.assets}
+        paths.discard(None)
+        self.asset_logo_digests = get_logo_hash_cache().digests(sorted(paths))
+
+
+def get_local_logo_path(logo: str | None) -> str | None:
+    if logo and logo.startswith(BC_REPO_ROOT):
+        return logo[len(BC_REPO_ROOT):]
+    return None
 
-    for err in check_groups(groups, custody_currencies, prices, coins_dict, eth_erc20_tokens_dict, chains_dict):
-        yield err
 
-    for currency in custody_currencies:
-        if currency.symbol.upper() != currency.symbol:
-            yield Error(currency, f"Contains mix of lower and upper case letters")
+@dataclass
+class Rule:
+    name: str
+    scope: str
+    check: Callable
+    # Called once in the main process before the rule runs, e.g. to fill the context
+    prepare: Callable[[ValidationContext], None] = None
+    # Rules that aren't run by default have to be asked for with --rules
+    default: bool = True
+
+
+# What each scope's rules are called with, in the order issues are reported
+SCOPES = {
+    "group": lambda context: context.groups,
+    "currency": lambda context: context.custody_currencies,
+    "fiats": lambda context: [context.fiats],
+    "fiat": lambda context: context.fiats,
+    "assets": lambda context: [context.assets],
+    "asset": lambda context: context.assets,
+}
+
+RULES: list[Rule] = []
+
+
+def rule(name: str, scope: str, prepare: Callable[[ValidationContext], None] = None, default: bool = True):
+    def register(check):
+        RULES.append(Rule(name, scope, check, prepare, default))
+        return check
+    return register
+
+
+def check_logo(coin):
+    if coin.logo is None:
+        yield Warning(coin, "No logo")
 
-        ref = load_ref(currency.type, currency.symbol, coins_dict, eth_erc20_tokens_dict, chains_dict)
 
-        if ref is None:
-            yield Error(currency, "Reference not found")
+@rule("groups", "group")
+def check_group(group: Group, context: ValidationContext):
+    if group.parentSymbol in group.childSymbols:
+        yield Error(group.parentSymbol, f"also present in childSymbols")
+    # This could change but in the meantime that could avoid some mistakes
+    if "." in group.parentSymbol:
+        yield Error(group.parentSymbol, f"dotted parentSymbol not allowed")
+    if len(group.childSymbols) == 0:
+        yield Error(group.parentSymbol, f"empty group")
+
+    dotted_group = next((symbol for symbol in group.childSymbols if "." in symbol), None)
+    if dotted_group:
+        for symbol in group.childSymbols:
+            if group.parentSymbol != symbol.split(".")[0]:
+                yield Error(symbol, f"expected {group.parentSymbol} prefix")
+
+    all_group_symbols = [group.parentSymbol] + group.childSymbols
+    parent_custody = context.custody(group.parentSymbol)
+
+    if parent_custody is None:
+        yield Error(group.parentSymbol, f"defined in groups.json but not in custody.json")
+    ref = context.ref(parent_custody.type, parent_custody.symbol)
+    if ref is None:
+        yield Error(group.parentSymbol, f"defined in groups.json but reference not found")
+
+    parent_price = context.price(ref)
+
+    if parent_price <= 0:
+        yield Error(group.parentSymbol, f"no price defined")
+    for symbol in all_group_symbols:
+        found_in_custody = context.custody(symbol)
+
+        child_ref = context.ref(parent_custody.type, parent_custody.symbol)
+
+        if child_ref is None:
+            yield Error(symbol, f"defined in groups.json but reference not found")
+
+        child_price = context.price(child_ref)
+
+        if abs(child_price - parent_price) >= 0.01:
+            yield Error(symbol, f"too much price diff between parent and child")
+        if not found_in_custody:
+            yield Error(symbol, f"defined in groups.json but not in custody.json")
+        elif parent_custody.nabuSettings.custodialPrecision != found_in_custody.nabuSettings.custodialPrecision:
+            yield Error(symbol, f"expected same custodialPrecision as part of the same group")
+
+
+@rule("symbol_case", "currency")
+def check_symbol_case(currency: CustodyCurrency, context: ValidationContext):
+    if currency.symbol.upper() != currency.symbol:
+        yield Error(currency, f"Contains mix of lower and upper case letters")
+
+
+# The following currency rules only apply to currencies with a reference
+
+@rule("reference", "currency")
+def check_reference(currency: CustodyCurrency, context: ValidationContext):
+    if context.currency_ref(currency) is None:
+        yield Error(currency, "Reference not found")
+
+
+@rule("logo", "currency")
+def check_currency_logo(currency: CustodyCurrency, context: ValidationContext):
+    ref = context.currency_ref(currency)
+    if ref is not None:
+        yield from check_logo(ref)
+
+
+@rule("symbol", "currency")
+def check_currency_symbol(currency: CustodyCurrency, context: ValidationContext):
+    if context.currency_ref(currency) is not None:
+        yield from currency.check_symbol()
+
+
+@rule("precision", "currency")
+def check_currency_precision(currency: CustodyCurrency, context: ValidationContext):
+    ref = context.currency_ref(currency)
+    if ref is not None:
+        yield from currency.check_precision(ref)
+
+
+@rule("min_confirmations", "currency")
+def check_currency_min_confirmations(currency: CustodyCurrency, context: ValidationContext):
+    if context.currency_ref(currency) is not None:
+        yield from currency.check_min_confirmations()
+
+
+@rule("price", "currency")
+def check_currency_price(currency: CustodyCurrency, context: ValidationContext):
+    ref = context.currency_ref(currency)
+    if ref is not None:
+        yield from currency.check_price(ref, context)
+
+
+@rule("fiat_duplicates", "fiats")
+def check_fiat_duplicates(fiats: List[Fiat], context: ValidationContext):
+    duplicates = find_duplicates(fiats, lambda f: f.symbol.upper())
+    for collision in duplicates:
+        yield Error(collision.symbol, f"Duplicate fiat symbol: {collision.entries}")
+
+
+@rule("fiat", "fiat")
+def check_fiat(fiat: Fiat, context: ValidationContext):
+    if fiat.symbol.upper() != fiat.symbol:
+        yield Error(fiat, "Contains mix of lower and upper case letters")
+
+    if not isinstance(fiat.decimals, int) or fiat.decimals < 0:
+        yield Error(fiat, f"Invalid decimals: {fiat.decimals}")
+
+    if not fiat.name:
+        yield Error(fiat, "Missing name")
+
+    expected_logo = fiat.expected_logo_url()
+    if fiat.logo != expected_logo:
+        yield Error(fiat, f"Invalid logo URL, expected {expected_logo}")
+
+
+@rule("fiat_logo", "fiat", prepare=ValidationContext.hash_fiat_logos)
+def check_fiat_logo(fiat: Fiat, context: ValidationContext):
+    logo_path = fiat.logo_path()
+    digest = context.fiat_logo_digests[logo_path]
+    if digest is None:
+        yield Error(fiat, f"Logo file not found: {logo_path}")
+        return
+
+    owner = context.fiat_logo_owners[digest]
+    if owner is not fiat:
+        yield Error(fiat, f"Duplicate logo content (same as {owner.symbol})")
+
+
+@rule("asset_logo", "asset", prepare=ValidationContext.hash_asset_logos)
+def check_asset_logo(asset: Token | Coin, context: ValidationContext):
+    logo_path = get_local_logo_path(asset.logo)
+    if logo_path is not None and context.asset_logo_digests[logo_path] is None:
+        yield Error(asset.symbol, f"Logo file not found: {logo_path}")
+
+
+@rule("duplicate_asset_logos", "assets", prepare=ValidationContext.hash_asset_logos, default=False)
+def check_duplicate_asset_logos(assets: list[Token | Coin], context: ValidationContext):
+    # The same asset on several chains shares its logo, only different base symbols are reported
+    symbols_by_digest = {}
+    for asset in assets:
+        digest = context.asset_logo_digests.get(get_local_logo_path(asset.logo))
+        if digest is not None:
+            symbols_by_digest.setdefault(digest, []).append(asset.symbol)
+    for symbols in symbols_by_digest.values():
+        if len({symbol.partition(".")[0] for symbol in symbols}) > 1:
+            yield Warning(symbols[0], f"Same logo content as {', '.join(symbols[1:])}")
+
+
+@dataclass
+class ChangedInputs:
+    """Keys of the check inputs' entries that changed since a git revision."""
+    custody_symbols: set[str] = field(default_factory=set)
+    group_parents: set[str] = field(default_factory=set)
+    ref_symbols: set[str] = field(default_factory=set)
+    price_keys: set[str] = field(default_factory=set)
+    fiats: bool = False
+    asset_logos: bool = False
+    everything: bool = False
+
+
+def find_changed_inputs(rev: str, chain_list: list[Chain], prices: dict[str, float]) -> ChangedInputs:
+    changes = ChangedInputs()
+    files = changed_files(rev)
+    if any(path.startswith("scripts/") for path in files) or "chain/list.json" in files:
+        changes.everything = True
+        return changes
+
+    if "custody.json" in files:
+        changes.custody_symbols = changed_json_entries(rev, "custody.json", "symbol")
+    if "groups.json" in files:
+        changes.group_parents = changed_json_entries(rev, "groups.json", "parentSymbol")
+    for path in ["coins.json", "erc20-tokens.json"] + [chain.tokens for chain in chain_list]:
+        if path in files:
+            changes.ref_symbols |= changed_json_entries(rev, path, "symbol")
+    if EXT_PRICES in files:
+        changes.price_keys = changed_keys((read_json_at(rev, EXT_PRICES) or {}).get('prices', {}), prices)
+    # Fiats are few, and the logo checks compare them with each other: check them all or none
+    changes.fiats = any(path.startswith(EXT_FIATS) for path in files) or \
+        ("fiat.json" in files and bool(changed_json_entries(rev, "fiat.json", "symbol")))
+    # With cached logo hashes, re-checking every asset's logo is cheap
+    changes.asset_logos = bool(changes.ref_symbols) or any(path.startswith(EXT_BLOCKCHAINS) for path in files)
+    return changes
+
+
+def select_affected_entries(context: ValidationContext, changes: ChangedInputs) -> dict[str, list[int]]:
+    """
+    The entries of each scope whose checks may have a different outcome: changed
+    custody entries, those whose reference or price changed (or that have no
+    reference), and every member of a group that changed or has an affected member.
+    """
+    custody_symbols = set(changes.custody_symbols)
+    for currency in context.custody_currencies:
+        ref = context.currency_ref(currency)
+        if ref is None or ref.symbol in changes.ref_symbols or get_price_key(ref) in changes.price_keys:
+            custody_symbols.add(currency.symbol)
+
+    group_indexes = []
+    for index, group in enumerate(context.groups):
+        members = [group.parentSymbol] + group.childSymbols
+        if group.parentSymbol in changes.group_parents or not custody_symbols.isdisjoint(members):
+            group_indexes.append(index)
+    for index in group_indexes:
+        custody_symbols.add(context.groups[index].parentSymbol)
+        custody_symbols.update(context.groups[index].childSymbols)
+
+    return {
+        "group": group_indexes,
+        "currency": [index for index, currency in enumerate(context.custody_currencies)
+                     if currency.symbol in custody_symbols],
+        "fiats": [0] if changes.fiats else [],
+        "fiat": list(range(len(context.fiats))) if changes.fiats else [],
+        "assets": [0] if changes.asset_logos else [],
+        "asset": list(range(len(context.assets))) if changes.asset_logos else [],
+    }
+
+
+def run_rules_partition(context: ValidationContext, scope: str, rule_names: list[str], indexes: list[int]):
+    """
+    Runs the given rules over some entries of a scope. Returns the issues keyed
+    for the final merge, along with the time spent in each rule.
+    """
+    rules = [(index, rule) for index, rule in enumerate(RULES) if rule.name in rule_names]
+    entries = SCOPES[scope](context)
+    timings = Timings()
+    results = []
+    for rule_index, rule in rules:
+        with timings.measure(rule.name, f"{scope} {indexes[0]}-{indexes[-1]}"):
+            for entry_index in indexes:
+                for issue in rule.check(entries[entry_index], context):
+                    results.append(((entry_index, rule_index), issue))
+    return results, timings.entries
+
+
+_worker_context = None
+
+
+def set_worker_context(context: ValidationContext):
+    global _worker_context
+    _worker_context = context
+
+
+def run_worker_partition(scope: str, rule_names: list[str], indexes: list[int]):
+    return run_rules_partition(_worker_context, scope, rule_names, indexes)
+
+
+def run_rules(context: ValidationContext, rules: list[Rule], jobs: int = 1,
+              selection: dict[str, list[int]] = None) -> list[CheckResult]:
+    """
+    Runs each scope's rules over contiguous partitions of its entries (or of
+    the selected ones), in worker processes when jobs > 1. Issues are merged by
+    scope, entry and rule (in registration order), so the result doesn't
+    depend on jobs.
+    """
+    scope_indexes = {scope: list(range(len(entries(context)))) if selection is None else selection[scope]
+                     for scope, entries in SCOPES.items()}
+
+    timings = get_timings()
+    for rule in rules:
+        if rule.prepare is not None and scope_indexes[rule.scope]:
+            with timings.measure(rule.name, "prepare"):
+                rule.prepare(context)
+
+    partitions = []
+    for scope_index, scope in enumerate(SCOPES):
+        rule_names = [rule.name for rule in rules if rule.scope == scope]
+        indexes = scope_indexes[scope]
+        if not rule_names or not indexes:
             continue
+        chunk_size = -(-len(indexes) // jobs)
+        for chunk in chunks(indexes, chunk_size):
+            partitions.append((scope_index, (scope, rule_names, chunk)))
 
-        yield from itertools.chain(check_logo(ref), currency.check(ref, prices))
+    if jobs <= 1:
+        outputs = [run_rules_partition(context, *args) for _, args in partitions]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=set_worker_context,
+                                 initargs=(context,)) as executor:
+            futures = [executor.submit(run_worker_partition, *args) for _, args in partitions]
+            outputs = [future.result() for future in futures]
+
+    keyed_issues = []
+    for (scope_index, _), (results, timing_entries) in zip(partitions, outputs):
+        timings.merge(timing_entries)
+        keyed_issues.extend(((scope_index, *key), issue) for key, issue in results)
+    # Stable sort: issues from the same rule and entry stay in the order they were found
+    keyed_issues.sort(key=operator.itemgetter(0))
+    return [issue for _, issue in keyed_issues]
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rules', metavar='RULE[,RULE...]',
+                        help=f"only run these rules, out of: {', '.join(rule.name for rule in RULES)}")
+    parser.add_argument('--jobs', type=positive_int, default=1, help="number of worker processes running the rules")
+    parser.add_argument('--timings', action='store_true', help="print the time spent in each rule")
+    parser.add_argument('--changed-since', metavar='GIT_REV',
+                        help="only check the entries affected by changes since GIT_REV")
+    args = parser.parse_args()
+
+    rules = [rule for rule in RULES if rule.default]
+    if args.rules:
+        rule_names = args.rules.split(",")
+        unknown = set(rule_names) - {rule.name for rule in RULES}
+        if unknown:
+            parser.error(f"unknown rules: {', '.join(sorted(unknown))}")
+        rules = [rule for rule in RULES if rule.name in rule_names]
+
     groups = list(map(lambda x: Group(**x), read_json("groups.json")))
     coins = list(map(lambda x: Coin.from_dict(x), read_json("coins.json")))
     eth_erc20_tokens = list(map(lambda x: Token.from_dict(x), read_json("erc20-tokens.json")))
-    chains = list(map(lambda x: Chain(**x), read_json("chain/list.json")))
-    chains = dict((c.native, read_json(c.tokens)) for c in chains)
+    chain_list = list(map(lambda x: Chain(**x), read_json("chain/list.json")))
+    chains = dict((c.native, read_json(c.tokens)) for c in chain_list)
     chains = {k: list(map(lambda x: Token.from_dict(x), v)) for k, v in chains.items()}
-    other_tokens = [token for chain_tokens in chains.values() for token in chain_tokens]
 
     custody_currencies = list(map(lambda x: CustodyCurrency(**x), read_json("custody.json")))
     fiats = list(map(lambda x: Fiat(**x), read_json("fiat.json")))
 
-    combined = sorted(itertools.chain(coins, eth_erc20_tokens, other_tokens), key=lambda x: x.symbol)
-    duplicates = find_duplicates(combined, lambda t: t.symbol.upper())
+    prices = read_json(EXT_PRICES)['prices']
+    changes = find_changed_inputs(args.changed_since, chain_list, prices) if args.changed_since else None
+    if changes is not None and changes.everything:
+        print(f"Changes since {args.changed_since} may affect any check, checking everything")
+        changes = None
+
+    symbol_index = SymbolIndex(lambda t: t.symbol.upper())
+    symbol_index.add_all(coins, "coins.json")
+    symbol_index.add_all(eth_erc20_tokens, "erc20-tokens.json")
+    token_files = dict((c.native, c.tokens) for c in chain_list)
+    for native, chain_tokens in chains.items():
+        symbol_index.add_all(chain_tokens, token_files[native])
+    # Symbols that didn't change can't have started colliding
+    changed_symbols = None if changes is None else {symbol.upper() for symbol in changes.ref_symbols if symbol}
+    duplicates = symbol_index.collisions(symbols=changed_symbols)
 
     if duplicates:
-        raise Exception(f"Duplicate elements found: {duplicates}")
+        raise Exception("Duplicate elements found:" + "".join(f"\n- {collision}" for collision in duplicates))
 
     print(f"{len(coins)} coins")
     print(f"{len(eth_erc20_tokens)} ETH tokens")
     for (k, v) in chains.items():
         print(f"{len(v)} {k} tokens")
     print(f"{len(fiats)} fiats")
-    print(f"Total: {len(combined)}")
+    print(f"Total: {len(coins) + len(eth_erc20_tokens) + sum(map(len, chains.values()))}")
 
-    prices = read_json(EXT_PRICES)['prices']
-    issues = list(itertools.chain(
-        check_currencies(custody_currencies, coins, eth_erc20_tokens, chains, prices, groups),
-        check_fiats(fiats),
-    ))
+    context = ValidationContext(custody_currencies, coins, eth_erc20_tokens, chains, prices, groups, fiats)
+    selection = None
+    if changes is not None:
+        selection = select_affected_entries(context, changes)
+        print(f"Changes since {args.changed_since} affect {len(selection['currency'])} custody currencies, "
+              f"{len(selection['group'])} groups, {len(selection['fiat'])} fiats and {len(selection['asset'])} assets")
+    issues = run_rules(context, rules, args.jobs, selection)
 
     print("")
-    print(reduce(operator.add, map(lambda i: "\n- " + str(i), issues)))
+    print(reduce(operator.add, map(lambda i: "\n- " + str(i), issues), ""))
     print("")
 
+    logo_hash_cache = get_logo_hash_cache()
+    logo_hash_cache.save()
+    if args.timings:
+        for line in get_timings().report():
+            print(line)
+        print(logo_hash_cache.stats())
+
     if any(i.is_blocker() for i in issues):
         raise Exception("Blocker issue(s) found")
 
@@ -1,16 +1,49 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
 import os
+import pickle
+import threading
+import time
 import warnings
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from typing import Self
+from urllib.parse import quote
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
-from web3 import Web3
 
 from common_classes import build_dataclass_from_dict, Description, Token
-from utils import map_chunked, get_cardano_tokens_by_id
+from statics import CACHE_DIR
+from utils import chunks, map_chunked, get_cardano_tokens_by_id
 
 BATCH_SIZE = 250
+INFO_BATCH_SIZE = 50
+
+# Tokens below both thresholds are not added by --fill-from-coingecko
+MIN_USD_VOLUME = 750_000
+MIN_USD_MARKET_CAP = 30_000_000
+
+COIN_LIST_CACHE = os.path.join(CACHE_DIR, "coingecko", "coins-list.pickle")
+COIN_INFO_CACHE_DIR = os.path.join(CACHE_DIR, "coingecko", "coins")
+REJECTED_COINS_CACHE = os.path.join(CACHE_DIR, "coingecko", "rejected-coins.json")
+DESCRIPTIONS_JOURNAL = os.path.join(CACHE_DIR, "coingecko", "descriptions.jsonl")
+CLEANED_DESCRIPTIONS_CACHE = os.path.join(CACHE_DIR, "coingecko", "cleaned-descriptions.pickle")
+
+# Cache TTLs, in seconds
+COIN_LIST_TTL = int(os.getenv('COINGECKO_COIN_LIST_TTL', 24 * 60 * 60))
+COIN_INFO_TTL = int(os.getenv('COINGECKO_COIN_INFO_TTL', 6 * 60 * 60))
+REJECTED_COINS_TTL = int(os.getenv('COINGECKO_REJECTED_COINS_TTL', 7 * 24 * 60 * 60))
+# A rejected coin is reconsidered early when its volume or market cap grew by this factor
+REJECTED_COINS_MARKET_CHANGE = 2.0
+
+
+def is_listable(usd_volume: float | None, usd_market_cap: float | None) -> bool:
+    return (usd_volume or 0) >= MIN_USD_VOLUME or (usd_market_cap or 0) >= MIN_USD_MARKET_CAP
+
 
 coin_mappings = {
     "ADA": "cardano",
@@ -100,7 +133,7 @@ network_mappings = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class Coin:
     id: str
     symbol: str
@@ -112,17 +145,19 @@ class Coin:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class Market:
     id: str
     current_price: float
+    market_cap: float | None = None
+    total_volume: float | None = None
 
     @classmethod
     def from_dict(cls, dict_: object) -> Self:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class PlatformInfo:
     decimal_place: int
     contract_address: str
@@ -132,7 +167,7 @@ class PlatformInfo:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class LinksInfo:
     homepage: [str]
     whitepaper: str
@@ -142,7 +177,7 @@ class LinksInfo:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageInfo:
     thumb: str
     small: str
@@ -153,7 +188,7 @@ class ImageInfo:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class MarketData:
     current_price: dict[str, float]
     market_cap: dict[str, float]
@@ -164,7 +199,7 @@ class MarketData:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class CoinInfo:
     id: str
     symbol: str
@@ -181,22 +216,209 @@ class CoinInfo:
         return build_dataclass_from_dict(cls, dict_)
 
 
+def compact_coin_info(response: dict) -> dict:
+    # Only keep what CoinInfo uses, full payloads carry dozens of currencies and locales
+    data = {f.name: response[f.name] for f in fields(CoinInfo) if f.name in response}
+    if data.get('description'):
+        data['description'] = {'en': data['description'].get('en', '')}
+    if data.get('market_data'):
+        data['market_data'] = {f.name: data['market_data'].get(f.name, {}) for f in fields(MarketData)}
+    return data
+
+
+class ResponseCache:
+    """
+    Raw JSON responses stored one file per key, together with the validators
+    (ETag/Last-Modified) needed to revalidate them once the TTL has elapsed.
+    """
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe='') + ".json")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self.path(key)) as cache_file:
+                return json.load(cache_file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    @staticmethod
+    def validators(entry: dict | None) -> dict[str, str]:
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def response_validators(response: requests.Response, entry: dict | None) -> tuple[str | None, str | None]:
+        # A 304 isn't required to repeat the validators, keep the stored ones then
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 304 and entry is not None:
+            etag = etag or entry.get('etag')
+            last_modified = last_modified or entry.get('last_modified')
+        return etag, last_modified
+
+    def put(self, key: str, data: object, etag: str | None, last_modified: str | None):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump(dict(fetched_at=time.time(), etag=etag, last_modified=last_modified, data=data), cache_file)
+        os.replace(tmp_path, path)
+
+
+class RejectedCoins:
+    """
+    Coins found under the volume/market cap thresholds, with the market data
+    they had then. They're skipped until REJECTED_COINS_TTL elapses, or earlier
+    if their markets are known to have grown significantly since.
+    """
+
+    def __init__(self, path: str = REJECTED_COINS_CACHE, ttl: float = REJECTED_COINS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries = self.load_entries()
+        # Entries rejected (or accepted, as None) since loading
+        self.updated = {}
+
+    def load_entries(self) -> dict:
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def is_rejected(self, coin_id: str, usd_volume: float = None, usd_market_cap: float = None) -> bool:
+        entry = self.entries.get(coin_id)
+        if entry is None or time.time() - entry['rejected_at'] > self.ttl:
+            return False
+        if usd_volume is not None and usd_volume > entry['usd_volume'] * REJECTED_COINS_MARKET_CHANGE:
+            return False
+        if usd_market_cap is not None and usd_market_cap > entry['usd_market_cap'] * REJECTED_COINS_MARKET_CHANGE:
+            return False
+        return True
+
+    def reject(self, coin_id: str, usd_volume: float, usd_market_cap: float):
+        entry = dict(rejected_at=time.time(), usd_volume=usd_volume, usd_market_cap=usd_market_cap)
+        self.entries[coin_id] = self.updated[coin_id] = entry
+
+    def accept(self, coin_id: str):
+        self.entries.pop(coin_id, None)
+        self.updated[coin_id] = None
+
+    def save(self):
+        if not self.updated:
+            return
+        # --jobs workers save their own rejections, merge ours on top of theirs:
+        entries = self.load_entries()
+        for coin_id, entry in self.updated.items():
+            if entry is None:
+                entries.pop(coin_id, None)
+            else:
+                entries[coin_id] = entry
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump(entries, cache_file, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.entries = entries
+        self.updated = {}
+
+
+class RateLimiter:
+    """Token bucket shared by every thread issuing CoinGecko requests."""
+
+    def __init__(self, calls_per_minute: int, burst: int = 1):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
 class CoinGeckoAPIClient:
     API_KEY = os.getenv('COINGECKO_API_KEY')
     BASE_URL = "https://api.coingecko.com/api/v3/" if API_KEY is None else "https://pro-api.coingecko.com/api/v3/"
 
+    # Requests per minute allowed by the public (keyless) and pro tiers:
+    FREE_RATE_LIMIT = 30
+    PRO_RATE_LIMIT = 500
+    RATE_LIMIT = int(os.getenv('COINGECKO_RATE_LIMIT', FREE_RATE_LIMIT if API_KEY is None else PRO_RATE_LIMIT))
+    CONCURRENCY = int(os.getenv('COINGECKO_CONCURRENCY', 8))
+
+    MAX_RETRIES = 5
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    RETRY_BACKOFF = 2.0
+    TIMEOUT = 30
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=CONCURRENCY))
+    session.mount("http://", HTTPAdapter(pool_maxsize=CONCURRENCY))
+    rate_limiter = RateLimiter(RATE_LIMIT, burst=CONCURRENCY)
+    coin_info_cache = ResponseCache(COIN_INFO_CACHE_DIR, COIN_INFO_TTL)
+
+    @staticmethod
+    def share_rate_limit(processes: int):
+        # Called in each of the worker processes, which would otherwise all
+        # get the full budget from their own copy of the limiter
+        CoinGeckoAPIClient.rate_limiter = RateLimiter(CoinGeckoAPIClient.RATE_LIMIT / processes,
+                                                      burst=CoinGeckoAPIClient.CONCURRENCY // processes)
+
+    @staticmethod
+    def request(path: str, params: dict[str, str], headers: dict[str, str] = None) -> requests.Response:
+        params = dict(params, x_cg_pro_api_key=CoinGeckoAPIClient.API_KEY)
+        for attempt in range(CoinGeckoAPIClient.MAX_RETRIES + 1):
+            CoinGeckoAPIClient.rate_limiter.acquire()
+            response = CoinGeckoAPIClient.session.get(
+                f"{CoinGeckoAPIClient.BASE_URL}{path}", params=params, headers=headers,
+                timeout=CoinGeckoAPIClient.TIMEOUT)
+            if response.status_code not in CoinGeckoAPIClient.RETRY_STATUSES or \
+                    attempt == CoinGeckoAPIClient.MAX_RETRIES:
+                break
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() else CoinGeckoAPIClient.RETRY_BACKOFF * 2 ** attempt
+            time.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def get(path: str, params: dict[str, str]) -> object:
+        return CoinGeckoAPIClient.request(path, params).json()
+
     @staticmethod
     def fetch_usd_markets(ids: list[str]) -> list[Market]:
         try:
-            response = requests.get(
-                f"{CoinGeckoAPIClient.BASE_URL}coins/markets",
+            response = CoinGeckoAPIClient.get(
+                "coins/markets",
                 params={
-                    'x_cg_pro_api_key': CoinGeckoAPIClient.API_KEY,
                     'vs_currency': 'usd',
                     'ids': ','.join(ids),
                     'per_page': BATCH_SIZE
                 }
-            ).json()
+            )
             return [Market.from_dict(x) for x in response]
         except Exception as e:
             print(f'Error fetching CoinGecko prices: {str(e)}')
@@ -204,79 +426,154 @@ class CoinGeckoAPIClient:
 
     @staticmethod
     def get_coin_list() -> list[Coin]:
+        # The full list is several MB, so it's kept in a local cache and only
+        # revalidated against CoinGecko once COIN_LIST_TTL has elapsed:
+        cached = read_coin_list_cache()
+        if cached is not None and time.time() - cached['fetched_at'] < COIN_LIST_TTL:
+            return [Coin(*row) for row in cached['coins']]
+
+        headers = {}
+        if cached is not None and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached is not None and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
         try:
-            response = requests.get(
-                f"{CoinGeckoAPIClient.BASE_URL}coins/list",
-                params={
-                    'x_cg_pro_api_key': CoinGeckoAPIClient.API_KEY,
-                    'include_platform': 'true'
-                }
-            ).json()
-            return [Coin.from_dict(x) for x in response]
+            response = CoinGeckoAPIClient.request("coins/list", params={'include_platform': 'true'}, headers=headers)
+            if response.status_code == 304:
+                rows = cached['coins']
+            else:
+                rows = [(x['id'], x['symbol'], x['name'], x['platforms']) for x in response.json()]
         except Exception as e:
             print(f'Error fetching CoinGecko coin list: {str(e)}')
-            return []
+            if cached is None:
+                return []
+            print(f'Using stale CoinGecko coin list from {COIN_LIST_CACHE}')
+            rows = cached['coins']
+        else:
+            # The list was fetched fine, failing to cache it only costs a download next time
+            try:
+                write_coin_list_cache(rows, *ResponseCache.response_validators(response, cached))
+            except OSError as e:
+                print(f'Error writing CoinGecko coin list cache: {str(e)}')
+        return [Coin(*row) for row in rows]
 
     warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
 
     @staticmethod
-    def get_coin_info(coin_ids: list[str]) -> dict[str, CoinInfo]:
-        coin_infos = {}
-        for coin_id in coin_ids:
+    def fetch_coin_info(coin_id: str) -> CoinInfo | None:
+        cache = CoinGeckoAPIClient.coin_info_cache
+        cached = cache.get(coin_id)
+        if cached is not None:
+            # A bad entry is dropped and fetched again, rather than failing every run
             try:
-                response = requests.get(
-                    f"{CoinGeckoAPIClient.BASE_URL}coins/{coin_id}",
-                    params={
-                        'x_cg_pro_api_key': CoinGeckoAPIClient.API_KEY,
-                        'localization': 'false',
-                        'tickers': 'false',
-                        'market_data': 'true',
-                        'community_data': 'false',
-                        'developer_data': 'false',
-                        'sparkline': 'false'
-                    }
-                ).json()
-
-                coin_infos[coin_id] = CoinInfo.from_dict(response)
+                coin_info = CoinInfo.from_dict(cached['data'])
+                fresh = cache.is_fresh(cached)
             except Exception as e:
-                print(f'Error fetching CoinGecko prices: {str(e)}')
-                coin_infos[coin_id] = None
-        return coin_infos
+                print(f'Dropping cached CoinGecko info for {coin_id}: {str(e)}')
+                cached = None
+            else:
+                if fresh:
+                    return coin_info
+        try:
+            response = CoinGeckoAPIClient.request(
+                f"coins/{coin_id}",
+                params={
+                    'localization': 'false',
+                    'tickers': 'false',
+                    'market_data': 'true',
+                    'community_data': 'false',
+                    'developer_data': 'false',
+                    'sparkline': 'false'
+                },
+                headers=ResponseCache.validators(cached)
+            )
+            if response.status_code == 304:
+                data = cached['data']
+            else:
+                data = compact_coin_info(response.json())
+                # Decoded before caching, so a bad payload is never stored
+                coin_info = CoinInfo.from_dict(data)
+            cache.put(coin_id, data, *ResponseCache.response_validators(response, cached))
+            return coin_info
+        except Exception as e:
+            print(f'Error fetching CoinGecko prices: {str(e)}')
+            return None
+
+    @staticmethod
+    def get_coin_info(coin_ids: list[str]) -> dict[str, CoinInfo]:
+        with ThreadPoolExecutor(max_workers=CoinGeckoAPIClient.CONCURRENCY) as executor:
+            return dict(zip(coin_ids, executor.map(CoinGeckoAPIClient.fetch_coin_info, coin_ids)))
 
     @staticmethod
     def get_coin_description(coin_ids: list[str]) -> dict[str, Description]:
         coin_infos = CoinGeckoAPIClient.get_coin_info(coin_ids)
         return {coin_id: Description(
-            description=BeautifulSoup(coin_info.description['en'], 'html.parser').get_text(),
+            description=html_to_text(coin_info.description['en']),
             website=coin_info.links.homepage[0] if coin_info.links.homepage else ""
-        ) for coin_id, coin_info in coin_infos.items()}
+        ) if coin_info is not None else None for coin_id, coin_info in coin_infos.items()}
+
+
+def read_coin_list_cache() -> dict | None:
+    try:
+        with open(COIN_LIST_CACHE, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def write_coin_list_cache(rows: list[tuple], etag: str | None, last_modified: str | None):
+    os.makedirs(os.path.dirname(COIN_LIST_CACHE), exist_ok=True)
+    # Per process, as --jobs workers may refresh it concurrently
+    tmp_path = f"{COIN_LIST_CACHE}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as cache_file:
+        pickle.dump({
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'coins': rows
+        }, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, COIN_LIST_CACHE)
 
 
-coin_list = CoinGeckoAPIClient.get_coin_list()
-coin_list_by_id = {}
-coin_list_by_platform_and_address = {}
+class CoinIndex:
+    def __init__(self, coins: list[Coin]):
+        self.coins = coins
+        self.by_id = {}
+        self.by_platform_and_address = {}
 
-for coin in coin_list:
-    coin_list_by_id[coin.id] = coin
-    for platform, address in coin.platforms.items():
-        if address:
-            if platform not in coin_list_by_platform_and_address:
-                coin_list_by_platform_and_address[platform] = {}
-            coin_list_by_platform_and_address[platform][address.lower()] = coin
+        for coin in coins:
+            self.by_id[coin.id] = coin
+            for platform, address in coin.platforms.items():
+                if address:
+                    if platform not in self.by_platform_and_address:
+                        self.by_platform_and_address[platform] = {}
+                    self.by_platform_and_address[platform][address.lower()] = coin
+
+
+_coin_index = None
+
+
+def get_coin_index() -> CoinIndex:
+    # Built on first use so that runs that never touch CoinGecko don't pay for it
+    global _coin_index
+    if _coin_index is None:
+        _coin_index = CoinIndex(CoinGeckoAPIClient.get_coin_list())
+    return _coin_index
 
 
 def get_coin_by_id(coin_symbol):
     coin_gecko_id = coin_mappings.get(coin_symbol)
     if coin_gecko_id is None:
         return None
-    return coin_list_by_id.get(coin_gecko_id, None)
+    return get_coin_index().by_id.get(coin_gecko_id, None)
 
 
 def get_coin_by_chain_and_address(chain, token_address):
     network_id = network_mappings.get(chain, None)
     if network_id is None:
         return None
-    return coin_list_by_platform_and_address.get(network_id, {}).get(token_address.lower(), None)
+    return get_coin_index().by_platform_and_address.get(network_id, {}).get(token_address.lower(), None)
 
 
 def get_coins_by_id(coins):
@@ -292,11 +589,11 @@ def get_tokens_by_id(network, tokens):
     network_coin_gecko_id = network_mappings.get(network.symbol)
 
     if network_coin_gecko_id is not None:
+        coins_by_address = get_coin_index().by_platform_and_address.get(network_coin_gecko_id, {})
         if network.symbol.lower() == 'ada':
-            coin_list = coin_list_by_platform_and_address.get(network_coin_gecko_id, {})
-            return get_cardano_tokens_by_id(tokens, coin_list)
+            return get_cardano_tokens_by_id(tokens, coins_by_address)
         for token in tokens:
-            coin = coin_list_by_platform_and_address.get(network_coin_gecko_id, {}).get(token.address.lower(), None)
+            coin = coins_by_address.get(token.address.lower(), None)
             if coin is not None:
                 tokens_by_id.setdefault(coin.id, []).append(token)
 
@@ -323,49 +620,279 @@ def fetch_token_prices(network, tokens):
     return prices
 
 
-def fetch_coin_descriptions(coins):
+async def fetch_prices_pipelined(coins, networks, read_tokens) -> dict[str, float]:
+    """
+    Same result as fetch_coin_prices plus fetch_token_prices over every network,
+    but with asset reading, id resolution and market requests overlapping
+    across networks. Stages are connected through a bounded queue of market
+    batches, drained by CONCURRENCY fetchers sharing the client rate limiter.
+    """
+    batches = asyncio.Queue(maxsize=2 * CoinGeckoAPIClient.CONCURRENCY)
+    # Results are kept per source, and merged in the serial order at the end
+    coin_prices = {}
+    token_prices = {network.symbol: {} for network in networks}
+
+    async def fetch_batches():
+        while (batch := await batches.get()) is not None:
+            prices, price_keys_by_id, ids = batch
+            for market in await asyncio.to_thread(CoinGeckoAPIClient.fetch_usd_markets, ids):
+                for price_key in price_keys_by_id.get(market.id, []):
+                    prices[price_key] = market.current_price
+
+    async def enqueue(prices, price_keys_by_id):
+        for ids in chunks(list(price_keys_by_id.keys()), BATCH_SIZE):
+            await batches.put((prices, price_keys_by_id, ids))
+
+    async def resolve_network(network):
+        tokens = await asyncio.to_thread(read_tokens, network.chain)
+        tokens_by_id = get_tokens_by_id(network, tokens)
+        print(f"Resolved {len(tokens_by_id)} CoinGecko ids for {len(tokens)} {network.symbol} tokens")
+        # TrustWallet symbols aren't unique, so we key tokens by {address}.{network} to track token prices correctly.
+        await enqueue(token_prices[network.symbol], {
+            coin_id: [token.address + '.' + network.symbol for token in id_tokens]
+            for coin_id, id_tokens in tokens_by_id.items()
+        })
+
+    # Load the coin index up front, rather than racing to build it from several threads
+    await asyncio.to_thread(get_coin_index)
+
+    fetchers = [asyncio.create_task(fetch_batches()) for _ in range(CoinGeckoAPIClient.CONCURRENCY)]
+    await enqueue(coin_prices, {
+        coin_id: [coin.symbol for coin in id_coins] for coin_id, id_coins in get_coins_by_id(coins).items()
+    })
+    await asyncio.gather(*map(resolve_network, networks))
+    for _ in fetchers:
+        await batches.put(None)
+    await asyncio.gather(*fetchers)
+
+    prices = dict(coin_prices)
+    for network in networks:
+        prices.update(token_prices[network.symbol])
+    return prices
+
+
+class DescriptionJournal:
+    """
+    Append-only log of fetched descriptions, so that an interrupted
+    --fetch-descriptions run resumes with the ids it hadn't fetched yet.
+    Entries older than max_age seconds are fetched again.
+    """
+
+    def __init__(self, max_age: float, path: str = DESCRIPTIONS_JOURNAL):
+        self.path = path
+        self.max_age = max_age
+        self.entries = {}
+        line = "\n"
+        try:
+            with open(path) as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Partially written line from an interrupted run
+                        continue
+                    self.entries[entry['id']] = entry
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.journal_file = open(path, "a")
+        if not line.endswith("\n"):
+            self.journal_file.write("\n")
+
+    def get(self, coin_id: str) -> Description | None:
+        entry = self.entries.get(coin_id)
+        if entry is None or time.time() - entry['fetched_at'] > self.max_age:
+            return None
+        return Description(description=entry['description'], website=entry['website'])
+
+    def append(self, coin_id: str, description: Description):
+        entry = dict(id=coin_id, fetched_at=time.time(), description=description.description,
+                     website=description.website)
+        self.entries[coin_id] = entry
+        self.journal_file.write(json.dumps(entry) + "\n")
+        self.journal_file.flush()
+
+    def compact(self):
+        # Keep only the latest entry per id
+        self.journal_file.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as journal_file:
+            for entry in self.entries.values():
+                journal_file.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+        self.journal_file = open(self.path, "a")
+
+
+def html_to_text(html: str) -> str:
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def timed_html_to_text(html: str) -> tuple[str, float]:
+    start = time.perf_counter()
+    text = html_to_text(html)
+    return text, time.perf_counter() - start
+
+
+class DescriptionCleaner:
+    """
+    HTML to text stage for descriptions. Parsing runs in a process pool while
+    the next batch is being fetched, and results are cached by content hash so
+    unchanged descriptions are never parsed again.
+    """
+
+    def __init__(self, workers: int = None, path: str = CLEANED_DESCRIPTIONS_CACHE):
+        self.path = path
+        try:
+            with open(path, "rb") as cache_file:
+                self.texts = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.texts = {}
+        # Spawned rather than forked, as the fetch stage runs threads
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.cached = 0
+        self.parsed = 0
+        self.fetch_time = 0.0
+        self.parse_time = 0.0
+        self.wait_time = 0.0
+
+    def fetch(self, coin_ids: list[str]) -> dict[str, CoinInfo]:
+        start = time.perf_counter()
+        coin_infos = CoinGeckoAPIClient.get_coin_info(coin_ids)
+        self.fetch_time += time.perf_counter() - start
+        return coin_infos
+
+    def submit(self, coin_infos: dict[str, CoinInfo]) -> list[tuple]:
+        pending = []
+        for coin_id, coin_info in coin_infos.items():
+            if coin_info is None:
+                continue
+            html = coin_info.description['en']
+            digest = hashlib.blake2b(html.encode(), digest_size=16).digest()
+            website = coin_info.links.homepage[0] if coin_info.links.homepage else ""
+            if digest in self.texts:
+                self.cached += 1
+                pending.append((coin_id, website, digest, None))
+            else:
+                pending.append((coin_id, website, digest, self.executor.submit(timed_html_to_text, html)))
+        return pending
+
+    def results(self, pending: list[tuple]) -> dict[str, Description]:
+        descriptions = {}
+        start = time.perf_counter()
+        for coin_id, website, digest, future in pending:
+            if future is not None:
+                self.texts[digest], parse_time = future.result()
+                self.parse_time += parse_time
+                self.parsed += 1
+            descriptions[coin_id] = Description(description=self.texts[digest], website=website)
+        self.wait_time += time.perf_counter() - start
+        return descriptions
+
+    def close(self):
+        self.executor.shutdown()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump(self.texts, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> str:
+        return (f"Descriptions: fetch {self.fetch_time:.1f}s, "
+                f"clean {self.parse_time:.1f}s CPU ({self.parsed} parsed, {self.cached} cached), "
+                f"waited {self.wait_time:.1f}s on cleaning")
+
+
+def fetch_descriptions_by_id(coin_ids: list[str], journal: DescriptionJournal = None,
+                             cleaner: DescriptionCleaner = None) -> dict[str, Description]:
+    fetched = {}
+    missing_ids = []
+    for coin_id in coin_ids:
+        description = journal.get(coin_id) if journal is not None else None
+        if description is not None:
+            fetched[coin_id] = description
+        else:
+            missing_ids.append(coin_id)
+    if journal is not None:
+        print(f"{len(fetched)} descriptions fetched recently, {len(missing_ids)} left to fetch")
+
+    def collect(descriptions):
+        for coin_id, description in descriptions.items():
+            if description is not None:
+                fetched[coin_id] = description
+                if journal is not None:
+                    journal.append(coin_id, description)
+
+    if cleaner is None:
+        for chunk in map_chunked(CoinGeckoAPIClient.get_coin_description, missing_ids, INFO_BATCH_SIZE):
+            collect(chunk)
+    else:
+        # Each batch is cleaned while the next one is being fetched
+        pending = []
+        for coin_infos in map_chunked(cleaner.fetch, missing_ids, INFO_BATCH_SIZE):
+            collect(cleaner.results(pending))
+            pending = cleaner.submit(coin_infos)
+        collect(cleaner.results(pending))
+
+    return {coin_id: fetched[coin_id] for coin_id in coin_ids if coin_id in fetched}
+
+
+def fetch_coin_descriptions(coins, journal: DescriptionJournal = None, cleaner: DescriptionCleaner = None):
     coins_by_id = get_coins_by_id(coins)
     descriptions = {}
-    for chunk in map_chunked(CoinGeckoAPIClient.get_coin_description, list(coins_by_id.keys()), 1):
-        for id, description in chunk.items():
-            if description is not None:
-                for coin in coins_by_id[id]:
-                    descriptions[coin.symbol] = description
+    for id, description in fetch_descriptions_by_id(list(coins_by_id.keys()), journal, cleaner).items():
+        for coin in coins_by_id[id]:
+            descriptions[coin.symbol] = description
     return descriptions
 
 
-def fetch_token_descriptions(network, tokens):
+def fetch_token_descriptions(network, tokens, journal: DescriptionJournal = None, cleaner: DescriptionCleaner = None):
     tokens_by_id = get_tokens_by_id(network, tokens)
     descriptions = {}
-    for chunk in map_chunked(CoinGeckoAPIClient.get_coin_description, list(tokens_by_id.keys()), 1):
-        for id, description in chunk.items():
-            if description is not None:
-                for token in tokens_by_id[id]:
-                    descriptions[token.symbol] = description
+    for id, description in fetch_descriptions_by_id(list(tokens_by_id.keys()), journal, cleaner).items():
+        for token in tokens_by_id[id]:
+            descriptions[token.symbol] = description
     return descriptions
 
 
 def fetch_missing_tokens_for_network(network, tokens):
+    # web3 takes over a second to import, only pay for it when it's needed
+    from web3 import Web3
+
     existing_coin_ids = get_tokens_by_id(network, tokens).keys()
     coingecko_platform = network_mappings.get(network.symbol)
     if coingecko_platform is None:
         return []
+    candidate_ids = [coin.id for coin in get_coin_index().coins
+                     if coingecko_platform in coin.platforms and coin.id not in existing_coin_ids]
+
+    # Screen candidates in bulk through /coins/markets first, and only fetch
+    # the full details (for contract addresses and decimals) of the survivors:
+    rejected_coins = RejectedCoins()
     network_coin_ids = []
-    for coin in coin_list:
-        if coingecko_platform in coin.platforms and coin.id not in existing_coin_ids:
-            network_coin_ids.append(coin.id)
-    print(f"Found {str(len(network_coin_ids))} missing coins in CoinGecko for {network.symbol}")
+    skipped = 0
+    for markets in map_chunked(CoinGeckoAPIClient.fetch_usd_markets, candidate_ids, BATCH_SIZE):
+        for market in markets:
+            if not is_listable(market.total_volume, market.market_cap):
+                continue
+            if rejected_coins.is_rejected(market.id, market.total_volume, market.market_cap):
+                skipped += 1
+                continue
+            network_coin_ids.append(market.id)
+    print(f"Found {str(len(candidate_ids))} missing coins in CoinGecko for {network.symbol}, "
+          f"{len(network_coin_ids)} over the volume/market cap thresholds, skipping {skipped} recently rejected")
     new_tokens = []
-    for coin_infos in map_chunked(CoinGeckoAPIClient.get_coin_info, network_coin_ids, 10):
+    for coin_infos in map_chunked(CoinGeckoAPIClient.get_coin_info, network_coin_ids, INFO_BATCH_SIZE):
         for coin_id, coin_info in coin_infos.items():
             if coin_info is None:
                 # print(f"Got None coin_info for {coin_id}")
                 continue
             usd_24h_volume = coin_info.market_data.total_volume.get('usd', 0)
             usd_mkcap = coin_info.market_data.market_cap.get('usd', 0)
-            if usd_24h_volume < 750_000 and usd_mkcap < 30_000_000:
+            if not is_listable(usd_24h_volume, usd_mkcap):
                 # print(f"Skipping {coin_id} due to low USD volume ({usd_24h_volume}) and market cap ({usd_mkcap})")
+                rejected_coins.reject(coin_id, usd_24h_volume, usd_mkcap)
                 continue
+            rejected_coins.accept(coin_id)
             # print(f"Adding {coin_id} (volume={usd_24h_volume}, mkcap={usd_mkcap})")
             address = coin_info.detail_platforms[coingecko_platform].contract_address
             if Web3.is_address(address):
@@ -380,4 +907,5 @@ def fetch_missing_tokens_for_network(network, tokens):
                 symbol=coin_info.symbol.upper(),
                 website=links[0] if links else ""
             ))
+    rejected_coins.save()
     return new_tokens
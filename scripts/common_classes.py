@@ -1,29 +1,126 @@
 import os
 import re
-from dataclasses import dataclass, replace, fields, is_dataclass
+import sys
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Dict, List, get_args, get_origin
 from urllib.parse import urljoin
 
 from statics import BC_REPO_ROOT, EXT_BLOCKCHAINS, BLOCKCHAINS, TW_REPO_ROOT
 
+# At most 8 letters and digits:
+TOKEN_SYMBOL_PATTERN = re.compile("^[a-zA-Z0-9]{1,8}$")
 
-def build_dataclass_from_dict(cls, dict_):
-    class_fields = {f.name: f.type for f in fields(cls)}
-    init_args = {}
-    for key, value in dict_.items():
-        if key in class_fields:
-            field_type = class_fields[key]
-            if is_dataclass(field_type):
-                init_args[key] = build_dataclass_from_dict(field_type, value)
-            elif isinstance(value, list) and is_dataclass(field_type[0]):
-                init_args[key] = [build_dataclass_from_dict(field_type[0], item) for item in value]
-            elif isinstance(value, dict) and is_dataclass(field_type.__args__[1]):
-                init_args[key] = {k: build_dataclass_from_dict(field_type.__args__[1], v) for k, v in value.items()}
+
+def intern(value):
+    # Symbols repeat a lot (symbol == displaySymbol, shared chain keys), keep a single copy
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class LogoResolver:
+    """
+    Answers file existence checks for logos from directory listings, each
+    directory being scanned at most once, instead of a stat call per lookup.
+    """
+
+    def __init__(self):
+        self.listings = {}
+        self.lookups = 0
+        self.scans = 0
+
+    def listing(self, directory):
+        entries = self.listings.get(directory)
+        if entries is None:
+            parent, name = os.path.split(directory)
+            # The root is its own parent ("/" splits into "/" and "")
+            if parent and name and not self.exists_in(parent, name):
+                entries = frozenset()
             else:
+                self.scans += 1
+                try:
+                    with os.scandir(directory) as it:
+                        entries = frozenset(entry.name for entry in it)
+                except (FileNotFoundError, NotADirectoryError):
+                    entries = frozenset()
+            self.listings[directory] = entries
+        return entries
+
+    def exists_in(self, directory, name):
+        return name in self.listing(os.path.normpath(directory))
+
+    def exists(self, path):
+        self.lookups += 1
+        directory, name = os.path.split(os.path.normpath(path))
+        return self.exists_in(directory, name)
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.scans = 0
+
+    def stats(self):
+        return f"Logo resolver: {self.lookups} lookups answered with {self.scans} directory scans"
+
+
+logo_resolver = LogoResolver()
+
+
+def build_field_converter(field_type):
+    # Returns a function converting a raw JSON value for this field type, or
+    # None when the value can be used as is
+    if is_dataclass(field_type):
+        return get_decoder(field_type)
+
+    if isinstance(field_type, list):
+        item_type = field_type[0]
+    elif get_origin(field_type) in (list, List):
+        item_type = get_args(field_type)[0]
+    else:
+        item_type = None
+    if item_type is not None and is_dataclass(item_type):
+        item_decoder = get_decoder(item_type)
+        return lambda value: [item_decoder(item) for item in value] if isinstance(value, list) else value
+
+    if get_origin(field_type) in (dict, Dict) and is_dataclass(get_args(field_type)[1]):
+        value_decoder = get_decoder(get_args(field_type)[1])
+        return lambda value: {k: value_decoder(v) for k, v in value.items()} if isinstance(value, dict) else value
+
+    return None
+
+
+def build_decoder(cls):
+    converters = {f.name: build_field_converter(f.type) for f in fields(cls)}
+    plain_fields = frozenset(name for name, converter in converters.items() if converter is None)
+    nested_fields = {name: converter for name, converter in converters.items() if converter is not None}
+
+    def decode(dict_):
+        # Fast path: flat classes fed with known keys only
+        if not nested_fields and dict_.keys() <= plain_fields:
+            return cls(**dict_)
+        init_args = {}
+        for key, value in dict_.items():
+            if key in plain_fields:
                 init_args[key] = value
-    return cls(**init_args)
+            elif key in nested_fields:
+                init_args[key] = nested_fields[key](value)
+        return cls(**init_args)
 
+    return decode
 
-@dataclass
+
+_decoders = {}
+
+
+def get_decoder(cls):
+    decoder = _decoders.get(cls)
+    if decoder is None:
+        decoder = _decoders[cls] = build_decoder(cls)
+    return decoder
+
+
+def build_dataclass_from_dict(cls, dict_):
+    return get_decoder(cls)(dict_)
+
+
+@dataclass(slots=True)
 class Asset:
     id: str
     decimals: int
@@ -38,7 +135,7 @@ class Asset:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class Blockchain:
     name: str
     key: str
@@ -66,7 +163,7 @@ class Blockchain:
         return build_dataclass_from_dict(cls, dict_)
 
 
-@dataclass
+@dataclass(slots=True)
 class Coin:
     symbol: str
     displaySymbol: str
@@ -78,9 +175,9 @@ class Coin:
 
     @staticmethod
     def build_currency_logo(key):
-        if os.path.exists(os.path.join(EXT_BLOCKCHAINS, key, "info", "logo.png")):
+        if logo_resolver.exists(os.path.join(EXT_BLOCKCHAINS, key, "info", "logo.png")):
             return BC_REPO_ROOT + os.path.join(EXT_BLOCKCHAINS, key, "info", "logo.png")
-        elif os.path.exists(os.path.join(BLOCKCHAINS, key, "info", "logo.png")):
+        elif logo_resolver.exists(os.path.join(BLOCKCHAINS, key, "info", "logo.png")):
             return TW_REPO_ROOT + os.path.join("blockchains", key, "info", "logo.png")
         else:
             return None
@@ -88,10 +185,10 @@ class Coin:
     @staticmethod
     def from_chain(chain):
         return Coin(
-            symbol=chain.symbol,
-            displaySymbol=chain.displaySymbol or chain.symbol,
+            symbol=intern(chain.symbol),
+            displaySymbol=intern(chain.displaySymbol or chain.symbol),
             name=chain.name,
-            key=chain.key,
+            key=intern(chain.key),
             logo=Coin.build_currency_logo(chain.key),
             decimals=chain.decimals,
             website=chain.website
@@ -108,7 +205,7 @@ class Description:
     website: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     address: str
     decimals: int
@@ -119,12 +216,11 @@ class Token:
     website: str
 
     def is_valid(self):
-        # At most 8 letters and digits:
-        return re.match("^[a-zA-Z0-9]{1,8}$", self.symbol) is not None
+        return TOKEN_SYMBOL_PATTERN.match(self.symbol) is not None
 
     @staticmethod
     def build_token_logo(address, chain):
-        if os.path.exists(os.path.join(f"extensions/blockchains/{chain}/assets/", address, "logo.png")):
+        if logo_resolver.exists(os.path.join(f"extensions/blockchains/{chain}/assets/", address, "logo.png")):
             base_path = BC_REPO_ROOT + f"extensions/blockchains/{chain}/assets/"
         else:
             base_path = TW_REPO_ROOT + f"blockchains/{chain}/assets/"
@@ -136,10 +232,10 @@ class Token:
         return Token(
             address=asset.id,
             decimals=asset.decimals,
-            displaySymbol=asset.displaySymbol or asset.symbol,
+            displaySymbol=intern(asset.displaySymbol or asset.symbol),
             logo=Token.build_token_logo(asset.id, chain),
             name=asset.name,
-            symbol=asset.symbol,
+            symbol=intern(asset.symbol),
             website=asset.website
         )
 
@@ -155,13 +251,20 @@ class Token:
         self.name = self.name.replace(" (Ondo Tokenized)", "")
         return self
 
+    # The following transforms update the token in place rather than copying it
+
+    def uppercase(self):
+        self.symbol = intern(self.symbol.upper())
+        return self
+
     def with_suffix(self, network):
         if self.should_append_network_suffix(network):
-            return replace(self, symbol=f"{self.symbol}.{network.symbol}")
+            self.symbol = f"{self.symbol}.{network.symbol}"
         return self
 
     def without_suffix(self, network):
-        return replace(self, symbol=self.symbol.removesuffix(f".{network.symbol}"))
+        self.symbol = intern(self.symbol.removesuffix(f".{network.symbol}"))
+        return self
 
     @classmethod
     def from_dict(cls, dict_):
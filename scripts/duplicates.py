@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+
+def lower_symbol(entry) -> str:
+    return entry.symbol.lower()
+
+
+@dataclass(slots=True)
+class Collision:
+    symbol: str
+    entries: list
+    sources: list[str]
+
+    def __str__(self):
+        entries = ", ".join(f"{entry} ({source})" if source else str(entry)
+                            for entry, source in zip(self.entries, self.sources))
+        return f"'{self.symbol}' is shared by: {entries}"
+
+
+class SymbolIndex:
+    """
+    Entries grouped by a normalized symbol in a single pass, along with where
+    each one came from. New entries can be checked against it, or added to it,
+    without rebuilding it.
+    """
+
+    def __init__(self, key: Callable[[object], str] = lower_symbol):
+        self.key = key
+        self.entries = {}
+        self.sources = {}
+
+    def add(self, entry, source: str = "") -> bool:
+        # Returns whether the entry collides with any previously added one
+        symbol = self.key(entry)
+        entries = self.entries.get(symbol)
+        if entries is None:
+            self.entries[symbol] = [entry]
+            self.sources[symbol] = [source]
+            return False
+        entries.append(entry)
+        self.sources[symbol].append(source)
+        return True
+
+    def add_all(self, entries: Iterable, source: str = ""):
+        for entry in entries:
+            self.add(entry, source)
+
+    def __contains__(self, symbol: str) -> bool:
+        # symbol is expected to be normalized already, as returned by key
+        return symbol in self.entries
+
+    def collides(self, entry) -> bool:
+        return self.key(entry) in self.entries
+
+    def collisions(self, post_filter: Callable[[object], bool] = None,
+                   symbols: Iterable[str] = None) -> list[Collision]:
+        """
+        Symbols shared by more than one entry, in symbol order. With post_filter,
+        only the matching entries of each collision are reported. With symbols
+        (normalized), only those are looked up instead of scanning the index.
+        """
+        candidates = self.entries.keys() if symbols is None else set(symbols) & self.entries.keys()
+        collisions = []
+        for symbol in sorted(symbol for symbol in candidates if len(self.entries[symbol]) > 1):
+            entries, sources = self.entries[symbol], self.sources[symbol]
+            if post_filter:
+                kept = [i for i, entry in enumerate(entries) if post_filter(entry)]
+                entries, sources = [entries[i] for i in kept], [sources[i] for i in kept]
+            collisions.append(Collision(symbol, list(entries), list(sources)))
+        return collisions
+
+
+def find_duplicates(items: Iterable, key: Callable[[object], str] = lower_symbol,
+                    post_filter: Callable[[object], bool] = None, source: str = "") -> list[Collision]:
+    index = SymbolIndex(key)
+    index.add_all(items, source)
+    return index.collisions(post_filter)
@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+from dataclasses import dataclass, field
+
+from statics import BLOCKCHAINS, EXT_BLOCKCHAINS, EXT_BLOCKCHAINS_DENYLIST, EXT_PRICES, FINAL_BLOCKCHAINS_LIST, \
+    DESCRIPTIONS_INFO, Network
+
+ASSETS_SUBMODULE = "assets"
+
+
+@dataclass
+class AffectedLists:
+    coins: bool = False
+    chains: set[str] = field(default_factory=set)
+    everything: bool = False
+
+    def networks(self, networks: list[Network]) -> list[Network]:
+        if self.everything:
+            return list(networks)
+        return [network for network in networks if network.chain in self.chains]
+
+    def includes_coins(self) -> bool:
+        return self.everything or self.coins
+
+
+def git(*args: str, cwd: str = None) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def changed_files(rev: str) -> set[str]:
+    # Committed and uncommitted changes since rev, plus new untracked files
+    changed = set(git("diff", "--name-only", rev, "--").splitlines())
+    changed.update(git("ls-files", "--others", "--exclude-standard").splitlines())
+    return changed
+
+
+def submodule_commit(rev: str | None) -> str | None:
+    if rev is None:
+        if os.path.exists(os.path.join(ASSETS_SUBMODULE, ".git")):
+            return git("rev-parse", "HEAD", cwd=ASSETS_SUBMODULE).strip()
+        rev = "HEAD"
+    # Output looks like "160000 commit <sha>\tassets"
+    fields = git("ls-tree", rev, ASSETS_SUBMODULE).split()
+    return fields[2] if len(fields) > 2 else None
+
+
+def changed_submodule_files(rev: str) -> set[str] | None:
+    """Files changed in the assets submodule since rev, or None if that can't be determined."""
+    old_commit = submodule_commit(rev)
+    new_commit = submodule_commit(None)
+    if old_commit == new_commit:
+        return set()
+    if old_commit is None or new_commit is None:
+        return None
+    try:
+        changed = git("diff", "--name-only", old_commit, new_commit, cwd=ASSETS_SUBMODULE).splitlines()
+    except subprocess.CalledProcessError:
+        # The old commit isn't available locally (e.g. shallow clone)
+        return None
+    return {os.path.join(ASSETS_SUBMODULE, path) for path in changed}
+
+
+def read_json_at(rev: str, path: str):
+    try:
+        return json.loads(git("show", f"{rev}:{path}"))
+    except subprocess.CalledProcessError:
+        return None
+
+
+def entries_by_key(entries: list[dict], key: str) -> dict[str, list[dict]]:
+    by_key = {}
+    for entry in entries:
+        by_key.setdefault(entry.get(key), []).append(entry)
+    return by_key
+
+
+def changed_keys(old: dict, new: dict) -> set:
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+def changed_json_entries(rev: str, path: str, key: str) -> set[str]:
+    """
+    Keys of the entries of a JSON list that were added, removed or modified
+    since rev. Compared as parsed JSON, so formatting and ordering don't count.
+    """
+    old_entries = read_json_at(rev, path) or []
+    with open(path) as json_file:
+        new_entries = json.load(json_file)
+    return changed_keys(entries_by_key(old_entries, key), entries_by_key(new_entries, key))
+
+
+def chains_with_price_changes(rev: str, networks: list[Network]) -> set[str]:
+    # Token lists only depend on which "<address>.<network>" keys are priced
+    old_prices = (read_json_at(rev, EXT_PRICES) or {}).get('prices', {})
+    with open(EXT_PRICES) as prices_file:
+        new_prices = json.load(prices_file).get('prices', {})
+
+    changed_keys = set(old_prices.keys()) ^ set(new_prices.keys())
+    changed_symbols = {key.rpartition(".")[2] for key in changed_keys if "." in key}
+    return {network.chain for network in networks if network.symbol in changed_symbols}
+
+
+def find_affected_lists(rev: str, networks: list[Network]) -> AffectedLists:
+    affected = AffectedLists()
+    output_files = {network.output_file: network.chain for network in networks}
+
+    submodule_files = changed_submodule_files(rev)
+    if submodule_files is None:
+        print(f"Could not diff the {ASSETS_SUBMODULE} submodule since {rev}, rebuilding everything")
+        affected.everything = True
+        return affected
+
+    for path in sorted(changed_files(rev) | submodule_files):
+        if path.startswith("scripts/"):
+            affected.everything = True
+        elif path == EXT_PRICES:
+            affected.chains.update(chains_with_price_changes(rev, networks))
+        elif path == DESCRIPTIONS_INFO:
+            affected.chains.update(network.chain for network in networks)
+        elif path == FINAL_BLOCKCHAINS_LIST:
+            # ETH tokens are checked against coins, as they have no suffix
+            affected.chains.add("ethereum")
+        elif path == EXT_BLOCKCHAINS_DENYLIST:
+            affected.coins = True
+        elif path in output_files:
+            affected.chains.add(output_files[path])
+        elif path.startswith(BLOCKCHAINS) or path.startswith(EXT_BLOCKCHAINS):
+            base_dir = BLOCKCHAINS if path.startswith(BLOCKCHAINS) else EXT_BLOCKCHAINS
+            chain, _, rest = path[len(base_dir):].partition("/")
+            if rest.startswith("info/"):
+                affected.coins = True
+            else:
+                affected.chains.add(chain)
+
+    if affected.coins:
+        affected.chains.add("ethereum")
+
+    return affected
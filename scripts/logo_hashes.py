@@ -0,0 +1,84 @@
+import hashlib
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from statics import CACHE_DIR
+
+LOGO_HASH_CACHE = os.path.join(CACHE_DIR, "logo-hashes.pickle")
+
+
+class LogoHashCache:
+    """
+    SHA-256 digests of logo files, keyed by path and validated by size and
+    mtime, so that unchanged logos are never read again.
+    """
+
+    def __init__(self, path: str = LOGO_HASH_CACHE):
+        self.path = path
+        self.entries = self.load_entries()
+        self.updated = False
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def load_entries(self) -> dict:
+        try:
+            with open(self.path, "rb") as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+
+    def digest(self, path: str) -> str | None:
+        """The file's digest, or None if it doesn't exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            with self.lock:
+                self.hits += 1
+            return entry[2]
+
+        with open(path, "rb") as logo_file:
+            digest = hashlib.sha256(logo_file.read()).hexdigest()
+        with self.lock:
+            self.misses += 1
+            self.entries[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            self.updated = True
+        return digest
+
+    def digests(self, paths: list[str]) -> dict[str, str | None]:
+        # Misses are mostly file I/O, and hashlib releases the GIL on large inputs
+        with ThreadPoolExecutor() as executor:
+            return dict(zip(paths, executor.map(self.digest, paths)))
+
+    def save(self):
+        if not self.updated:
+            return
+        entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump(entries, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.updated = False
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> str:
+        return f"Logo hash cache: {self.hits} hits, {self.misses} files hashed"
+
+
+_logo_hash_cache = None
+
+
+def get_logo_hash_cache() -> LogoHashCache:
+    global _logo_hash_cache
+    if _logo_hash_cache is None:
+        _logo_hash_cache = LogoHashCache()
+    return _logo_hash_cache
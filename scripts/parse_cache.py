@@ -0,0 +1,112 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+from typing import Any
+
+from statics import CACHE_DIR
+
+PARSE_CACHE = os.path.join(CACHE_DIR, "parsed-json.pickle")
+
+
+def parse_json(raw_data: bytes, comment_marker: str = None) -> Any:
+    text = raw_data.decode()
+    if comment_marker:
+        lines = io.StringIO(text, newline=None).readlines()
+        text = "".join(line.split(comment_marker)[0] for line in lines)
+    return json.loads(text)
+
+
+class ParseCache:
+    """
+    Parsed JSON files, keyed by path and validated by mtime and size. When those
+    changed (e.g. after a git checkout) the content hash is compared before
+    parsing again.
+    """
+
+    def __init__(self, path: str = PARSE_CACHE):
+        self.path = path
+        self.entries = self.load_entries()
+        self.updated = {}
+        self.reset_stats()
+
+    def load_entries(self) -> dict:
+        try:
+            with open(self.path, "rb") as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+
+    def read_json(self, path: str, comment_marker: str = None) -> Any:
+        key = (path, comment_marker)
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+
+        if entry is not None and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+            return entry['data']
+
+        with open(path, "rb") as json_file:
+            raw_data = json_file.read()
+        digest = hashlib.blake2b(raw_data, digest_size=16).digest()
+
+        if entry is not None and entry['hash'] == digest:
+            self.revalidated += 1
+            data = entry['data']
+        else:
+            self.misses += 1
+            data = parse_json(raw_data, comment_marker)
+
+        entry = dict(mtime=stat.st_mtime_ns, size=stat.st_size, hash=digest, data=data)
+        self.entries[key] = entry
+        self.updated[key] = entry
+        return data
+
+    def take_updated(self) -> dict:
+        # Entries read since the last call, for a --jobs worker to hand over
+        # to the parent, which saves them all at once
+        updated, self.updated = self.updated, {}
+        return updated
+
+    def merge(self, updated: dict):
+        self.entries.update(updated)
+        self.updated.update(updated)
+
+    def save(self):
+        if not self.updated:
+            return
+        # Other processes may have saved in the meantime, merge our changes on top:
+        entries = self.load_entries()
+        entries.update(self.updated)
+        entries = {key: entry for key, entry in entries.items() if key in self.updated or os.path.exists(key[0])}
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump(entries, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.updated = {}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def stats(self) -> str:
+        return f"Parse cache: {self.hits} hits, {self.revalidated} revalidated by hash, {self.misses} misses"
+
+
+_parse_cache = None
+
+
+def get_parse_cache() -> ParseCache:
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = ParseCache()
+    return _parse_cache
+
+
+def loaded_parse_cache() -> ParseCache | None:
+    # The cache if something used it, without loading it otherwise
+    return _parse_cache
@@ -0,0 +1,129 @@
+import json
+import os
+from typing import Self
+
+from statics import CACHE_DIR, EXT_PRICES
+from utils import read_json
+
+PRICE_HISTORY_DIR = os.path.join(CACHE_DIR, "prices")
+PRICE_HISTORY_LENGTH = int(os.getenv('PRICE_HISTORY_LENGTH', 30))
+
+# Coins are keyed by symbol alone, tokens by "<address>.<network symbol>"
+COINS_PARTITION = ""
+
+
+def split_price_key(key: str) -> tuple[str, str]:
+    address, _, partition = key.rpartition(".")
+    if not address or not partition:
+        return COINS_PARTITION, key
+    return partition, address
+
+
+def join_price_key(partition: str, address: str) -> str:
+    return f"{address}.{partition}" if partition != COINS_PARTITION else address
+
+
+def partition_prices(prices: dict[str, float]) -> dict[str, dict[str, float]]:
+    partitions = {}
+    for key, price in prices.items():
+        partition, address = split_price_key(key)
+        partitions.setdefault(partition, {})[address] = price
+    return partitions
+
+
+class PriceStore:
+    """
+    USD prices partitioned by network symbol, so that each network's build can
+    look up its tokens directly. Exports to and from the flat prices.json format.
+    """
+
+    def __init__(self, timestamp: str | None, partitions: dict[str, dict[str, float]]):
+        self.timestamp = timestamp
+        self.partitions = partitions
+
+    @classmethod
+    def from_prices_json(cls, data: dict) -> Self:
+        return cls(data.get('timestamp'), partition_prices(data['prices']))
+
+    @classmethod
+    def load(cls, path: str = EXT_PRICES) -> Self:
+        return cls.from_prices_json(read_json(path))
+
+    def network_prices(self, network_symbol: str) -> dict[str, float]:
+        return self.partitions.get(network_symbol, {})
+
+    def coin_prices(self) -> dict[str, float]:
+        return self.partitions.get(COINS_PARTITION, {})
+
+    def has_token(self, address: str, network_symbol: str) -> bool:
+        return address in self.partitions.get(network_symbol, ())
+
+    def get(self, key: str) -> float | None:
+        partition, address = split_price_key(key)
+        return self.partitions.get(partition, {}).get(address)
+
+    def to_prices_json(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "prices": {join_price_key(partition, address): price
+                       for partition, prices in self.partitions.items()
+                       for address, price in prices.items()}
+        }
+
+    def update(self, timestamp: str, prices: dict[str, float]) -> dict[str, dict[str, float]]:
+        """
+        Replaces the current quotes with a fresh set, returning the quotes that
+        are new or changed, per partition.
+        """
+        new_partitions = partition_prices(prices)
+        changed = {}
+        for partition, new_prices in new_partitions.items():
+            old_prices = self.partitions.get(partition, {})
+            changed_prices = {address: price for address, price in new_prices.items()
+                              if old_prices.get(address) != price}
+            if changed_prices or old_prices.keys() != new_prices.keys():
+                changed[partition] = changed_prices
+        for partition in self.partitions.keys() - new_partitions.keys():
+            changed[partition] = {}
+
+        self.timestamp = timestamp
+        self.partitions = new_partitions
+        return changed
+
+
+def history_path(partition: str) -> str:
+    return os.path.join(PRICE_HISTORY_DIR, f"{partition or 'coins'}.json")
+
+
+def record_price_history(store: PriceStore, changed: dict[str, dict[str, float]]):
+    """
+    Appends the changed quotes to a bounded per-asset history, only rewriting
+    the partitions that had changes.
+    """
+    os.makedirs(PRICE_HISTORY_DIR, exist_ok=True)
+    for partition, changed_prices in changed.items():
+        path = history_path(partition)
+        history = read_json(path) if os.path.exists(path) else {}
+
+        current = store.partitions.get(partition, {})
+        history = {address: entries for address, entries in history.items() if address in current}
+        for address, price in changed_prices.items():
+            entries = history.setdefault(address, [])
+            entries.append([store.timestamp, price])
+            del entries[:-PRICE_HISTORY_LENGTH]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as history_file:
+            json.dump(history, history_file, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+_price_store = None
+
+
+def get_price_store() -> PriceStore:
+    # Loaded once per process and shared by every network build
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore.load()
+    return _price_store
@@ -0,0 +1,316 @@
+"""
+Compact binary snapshot of the coin and token lists and custody.json, for
+consumers that need lookups at startup without parsing the JSON files.
+Only depends on the standard library, so it can be copied as is.
+
+Layout (little-endian), version 1:
+    header    magic, version, counts and sizes (HEADER)
+    offsets   u32 x (strings + 1), where each string starts in the blob
+    blob      UTF-8 strings, each stored once, padded to 4 bytes
+    assets    ASSET records, coins then tokens by network
+    custody   CUSTODY records
+    indexes   open-addressing tables for asset symbols, "<address>.<network>"
+              and custody symbols: u32 slots holding record + 1 (0 is empty),
+              probed linearly from crc32(key)
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Iterator
+
+SNAPSHOT_MAGIC = b"CDEFSNAP"
+SNAPSHOT_VERSION = 1
+
+# String id (or decimals) standing for null
+NONE = 0xFFFFFFFF
+
+# magic, version, strings, blob size, assets, custody, symbol slots, address slots, custody slots
+HEADER = struct.Struct("<8s8I")
+# symbol, displaySymbol, name, address (tokens) or key (coins), network (None for coins), logo, website, decimals
+ASSET = struct.Struct("<8I")
+# symbol, type, entry as compact JSON
+CUSTODY = struct.Struct("<3I")
+U32 = struct.Struct("<I")
+
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return NONE
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def encode(self) -> tuple[bytes, bytes]:
+        offsets = [0]
+        blob = bytearray()
+        for value in self.strings:
+            blob += value.encode()
+            offsets.append(len(blob))
+        blob += b"\0" * (-len(blob) % 4)
+        return struct.pack(f"<{len(offsets)}I", *offsets), bytes(blob)
+
+
+def index_slots(count: int) -> int:
+    # A power of two, at most half full
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+def key_hash(key: bytes) -> int:
+    return zlib.crc32(key)
+
+
+def build_index(keys: list[str | None], slots: int) -> bytes:
+    # First record wins for repeated keys, as in the lists' own lookups
+    table = [0] * slots
+    seen = set()
+    for record, key in enumerate(keys):
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        slot = key_hash(key.encode()) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = record + 1
+    return struct.pack(f"<{slots}I", *table)
+
+
+def address_key(address: str, network: str) -> str:
+    return f"{address}.{network}"
+
+
+def write_snapshot(path: str, coins: list[dict], tokens_by_network: dict[str, list[dict]], custody: list[dict]):
+    strings = StringTable()
+
+    assets = [(coin, None) for coin in coins]
+    assets += [(token, network) for network, tokens in tokens_by_network.items() for token in tokens]
+    asset_records = bytearray()
+    for asset, network in assets:
+        decimals = asset.get('decimals')
+        asset_records += ASSET.pack(
+            strings.intern(asset['symbol']),
+            strings.intern(asset['displaySymbol']),
+            strings.intern(asset['name']),
+            strings.intern(asset['key'] if network is None else asset['address']),
+            strings.intern(network),
+            strings.intern(asset['logo']),
+            strings.intern(asset['website']),
+            NONE if decimals is None else decimals,
+        )
+
+    custody_records = bytearray()
+    for entry in custody:
+        custody_records += CUSTODY.pack(
+            strings.intern(entry['symbol']),
+            strings.intern(entry['type']),
+            strings.intern(json.dumps(entry, separators=(",", ":"))),
+        )
+
+    symbol_slots = index_slots(len(assets))
+    address_slots = index_slots(len(assets))
+    custody_slots = index_slots(len(custody))
+    symbol_index = build_index([asset['symbol'] for asset, _ in assets], symbol_slots)
+    address_index = build_index([None if network is None else address_key(asset['address'], network)
+                                 for asset, network in assets], address_slots)
+    custody_index = build_index([entry['symbol'] for entry in custody], custody_slots)
+
+    offsets, blob = strings.encode()
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings.strings), len(blob), len(assets),
+                         len(custody), symbol_slots, address_slots, custody_slots)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as snapshot_file:
+        for section in (header, offsets, blob, asset_records, custody_records,
+                        symbol_index, address_index, custody_index):
+            snapshot_file.write(section)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot. Records are only decoded when looked up, so
+    opening it costs the same whatever its size.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as snapshot_file:
+            # Empty files can't be mapped, and have no header anyway
+            if os.fstat(snapshot_file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is too short to be a coin definitions snapshot")
+            self.data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, string_count, blob_size, self.asset_count, self.custody_count, \
+            self.symbol_slots, self.address_slots, self.custody_slots = HEADER.unpack_from(self.data)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a coin definitions snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+        self.offsets_start = HEADER.size
+        self.blob_start = self.offsets_start + (string_count + 1) * U32.size
+        self.assets_start = self.blob_start + blob_size
+        self.custody_start = self.assets_start + self.asset_count * ASSET.size
+        self.symbol_index_start = self.custody_start + self.custody_count * CUSTODY.size
+        self.address_index_start = self.symbol_index_start + self.symbol_slots * U32.size
+        self.custody_index_start = self.address_index_start + self.address_slots * U32.size
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string_bytes(self, string_id: int) -> bytes:
+        start, end = struct.unpack_from("<2I", self.data, self.offsets_start + string_id * U32.size)
+        return self.data[self.blob_start + start:self.blob_start + end]
+
+    def string(self, string_id: int) -> str | None:
+        return None if string_id == NONE else self.string_bytes(string_id).decode()
+
+    def asset(self, record: int) -> dict:
+        symbol, display_symbol, name, address, network, logo, website, decimals = \
+            ASSET.unpack_from(self.data, self.assets_start + record * ASSET.size)
+        return {
+            'symbol': self.string(symbol),
+            'displaySymbol': self.string(display_symbol),
+            'name': self.string(name),
+            'key' if network == NONE else 'address': self.string(address),
+            'decimals': None if decimals == NONE else decimals,
+            'logo': self.string(logo),
+            'website': self.string(website),
+        }
+
+    def asset_network(self, record: int) -> str | None:
+        return self.string(ASSET.unpack_from(self.data, self.assets_start + record * ASSET.size)[4])
+
+    def custody(self, record: int) -> dict:
+        entry = CUSTODY.unpack_from(self.data, self.custody_start + record * CUSTODY.size)[2]
+        return json.loads(self.string(entry))
+
+    def find(self, index_start: int, slots: int, key: bytes, matches) -> int | None:
+        slot = key_hash(key) & (slots - 1)
+        while True:
+            record = U32.unpack_from(self.data, index_start + slot * U32.size)[0]
+            if record == 0:
+                return None
+            if matches(record - 1):
+                return record - 1
+            slot = (slot + 1) & (slots - 1)
+
+    def by_symbol(self, symbol: str) -> dict | None:
+        """The coin or token with this exact symbol (e.g. "BTC", "USDC" or "USDC.SOL")."""
+        key = symbol.encode()
+
+        def matches(record):
+            return self.string_bytes(ASSET.unpack_from(self.data, self.assets_start + record * ASSET.size)[0]) == key
+
+        record = self.find(self.symbol_index_start, self.symbol_slots, key, matches)
+        return None if record is None else self.asset(record)
+
+    def by_address(self, address: str, network: str) -> dict | None:
+        """The token with this exact address on the network (by symbol, e.g. "ETH" or "SOL")."""
+        address_bytes, network_bytes = address.encode(), network.encode()
+
+        def matches(record):
+            fields = ASSET.unpack_from(self.data, self.assets_start + record * ASSET.size)
+            return fields[4] != NONE and self.string_bytes(fields[3]) == address_bytes and \
+                self.string_bytes(fields[4]) == network_bytes
+
+        key = address_key(address, network).encode()
+        record = self.find(self.address_index_start, self.address_slots, key, matches)
+        return None if record is None else self.asset(record)
+
+    def custody_by_symbol(self, symbol: str) -> dict | None:
+        key = symbol.encode()
+
+        def matches(record):
+            return self.string_bytes(CUSTODY.unpack_from(self.data, self.custody_start + record * CUSTODY.size)[0]) == key
+
+        record = self.find(self.custody_index_start, self.custody_slots, key, matches)
+        return None if record is None else self.custody(record)
+
+    def assets(self) -> Iterator[tuple[str | None, dict]]:
+        """(network, asset) for every coin (network None) and token, in list order."""
+        for record in range(self.asset_count):
+            yield self.asset_network(record), self.asset(record)
+
+    def custody_entries(self) -> Iterator[dict]:
+        for record in range(self.custody_count):
+            yield self.custody(record)
+
+
+def benchmark(path: str, json_paths: list[str], rounds: int = 5):
+    def best_of(f):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = f()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def load_json():
+        by_symbol = {}
+        for json_path in json_paths:
+            with open(json_path) as json_file:
+                for entry in json.load(json_file):
+                    by_symbol.setdefault(entry['symbol'], entry)
+        return by_symbol
+
+    json_time, by_symbol = best_of(load_json)
+    symbols = list(by_symbol)[::max(1, len(by_symbol) // 1000)]
+
+    def open_snapshot():
+        Snapshot(path).close()
+
+    open_time, _ = best_of(open_snapshot)
+    with Snapshot(path) as snapshot:
+        start = time.perf_counter()
+        for symbol in symbols:
+            snapshot.by_symbol(symbol) or snapshot.custody_by_symbol(symbol)
+        lookup_time = (time.perf_counter() - start) / len(symbols)
+        full_time, _ = best_of(lambda: (list(snapshot.assets()), list(snapshot.custody_entries())))
+
+    print(f"JSON: {sum(map(os.path.getsize, json_paths))} bytes parsed and indexed in {json_time * 1000:.1f}ms")
+    print(f"Snapshot: {os.path.getsize(path)} bytes opened in {open_time * 1000:.3f}ms, "
+          f"{lookup_time * 1_000_000:.1f}us per lookup, {full_time * 1000:.1f}ms to decode everything")
+
+
+def main():
+    # Run from the repository root, as the build scripts are
+    from statics import CUSTODY_LIST, FINAL_BLOCKCHAINS_LIST, NETWORKS, SNAPSHOT_FILE
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--benchmark', action='store_true', help="compare load times with the JSON files")
+    parser.add_argument('path', nargs='?', default=SNAPSHOT_FILE)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        json_paths = [FINAL_BLOCKCHAINS_LIST] + [network.output_file for network in NETWORKS] + [CUSTODY_LIST]
+        benchmark(args.path, json_paths)
+    else:
+        with Snapshot(args.path) as snapshot:
+            print(f"{args.path}: version {SNAPSHOT_VERSION}, {snapshot.asset_count} coins and tokens, "
+                  f"{snapshot.custody_count} custody currencies")
+
+
+if __name__ == '__main__':
+    main()
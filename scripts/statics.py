@@ -12,6 +12,13 @@ EXT_PRICES = "extensions/prices.json"
 EXT_OVERRIDES= "extensions/overrides.json"
 
 FINAL_BLOCKCHAINS_LIST = "coins.json"
+CUSTODY_LIST = "custody.json"
+SNAPSHOT_FILE = "definitions.snapshot"
+
+DESCRIPTIONS_TEXT = "description/en.json"
+DESCRIPTIONS_INFO = "description/info.json"
+
+CACHE_DIR = ".cache/"
 
 
 @dataclass
@@ -0,0 +1,57 @@
+import time
+from contextlib import contextmanager
+
+
+class Timings:
+    """
+    Wall-clock time spent per stage, summed over every section (e.g. network)
+    the stage ran for. Entries are plain dicts so that worker processes can
+    send theirs back to be merged.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    @contextmanager
+    def measure(self, stage: str, section: str = ""):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, section, time.perf_counter() - start)
+
+    def add(self, stage: str, section: str, seconds: float):
+        key = (stage, section)
+        self.entries[key] = self.entries.get(key, 0.0) + seconds
+
+    def merge(self, entries: dict[tuple[str, str], float]):
+        for (stage, section), seconds in entries.items():
+            self.add(stage, section, seconds)
+
+    def reset(self):
+        self.entries = {}
+
+    def report(self) -> list[str]:
+        # Stages in the order they first ran, with the slowest section of each
+        stages = {}
+        for (stage, section), seconds in self.entries.items():
+            total, count, slowest = stages.get(stage, (0.0, 0, ("", 0.0)))
+            stages[stage] = (total + seconds, count + 1, max(slowest, (section, seconds), key=lambda x: x[1]))
+
+        width = max((len(stage) for stage in stages), default=0)
+        lines = [f"{'Stage':<{width}}  {'Total':>8}  {'Runs':>4}  Slowest"]
+        for stage, (total, count, (section, seconds)) in stages.items():
+            slowest = f"{section} ({seconds:.3f}s)" if section else ""
+            lines.append(f"{stage:<{width}}  {total:>7.3f}s  {count:>4}  {slowest}")
+        lines.append(f"{'Total':<{width}}  {sum(self.entries.values()):>7.3f}s")
+        return lines
+
+
+_timings = None
+
+
+def get_timings() -> Timings:
+    global _timings
+    if _timings is None:
+        _timings = Timings()
+    return _timings
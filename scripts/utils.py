@@ -1,10 +1,15 @@
+import argparse
 import glob
 import json
+import os
+import pickle
 import sys
-from typing import List, Any, Dict, Tuple, TypeVar, Callable, Generator
+from typing import List, Any, Dict, Tuple, TypeVar, Callable, Generator, Iterable
 import bech32
 import hashlib
 
+from statics import CACHE_DIR
+
 T = TypeVar('T')
 R = TypeVar('R')
 
@@ -21,6 +26,13 @@ def map_chunked(f: Callable[[List[T]], R], items: List[T], chunk_size: int) -> G
         sys.stdout.flush()
     sys.stdout.write("\n")
 
+def positive_int(value: str) -> int:
+    # argparse type for counts like --jobs, where 0 or less makes no sense
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
 def read_json(path: str) -> Dict[str, Any]:
     with open(path) as json_file:
         return json.load(json_file)
@@ -41,22 +53,94 @@ def encode_cardano_fingerprint(policy_id: str, asset_name_hex: str) -> str:
 
     return fingerprint
 
-def filter_cardano_tokens_by_price(tokens, prices):
-    fingerprint_map = {}
-    for price_key in prices['prices']:
-        if not price_key.endswith(".ADA"):
-            continue
-        token_id = price_key.split(".")[0]
+CARDANO_FINGERPRINTS_CACHE = os.path.join(CACHE_DIR, "cardano-fingerprints.pickle")
+
+
+class CardanoFingerprints:
+    """
+    Memoized (policy_id, asset_name_hex) -> fingerprint mapping, with its
+    reverse index, persisted across runs.
+    """
+
+    def __init__(self, path: str = CARDANO_FINGERPRINTS_CACHE):
+        self.path = path
+        try:
+            with open(path, "rb") as cache_file:
+                data = pickle.load(cache_file)
+            self.by_asset_id = data['by_asset_id']
+            self.by_fingerprint = data['by_fingerprint']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            self.by_asset_id = {}
+            self.by_fingerprint = {}
+        self.computed = 0
+
+    def fingerprint(self, policy_id: str, asset_name_hex: str) -> str:
+        key = (policy_id, asset_name_hex)
+        fingerprint = self.by_asset_id.get(key)
+        if fingerprint is None:
+            fingerprint = encode_cardano_fingerprint(policy_id, asset_name_hex)
+            self.by_asset_id[key] = fingerprint
+            self.by_fingerprint[fingerprint] = key
+            self.computed += 1
+        return fingerprint
+
+    def fingerprints(self, asset_ids: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        fingerprints = {asset_id: self.fingerprint(*asset_id) for asset_id in asset_ids}
+        self.save()
+        return fingerprints
+
+    def asset_id(self, fingerprint: str) -> Tuple[str, str] | None:
+        # Only known for asset ids fingerprinted before, in this run or a previous one
+        return self.by_fingerprint.get(fingerprint)
+
+    def save(self):
+        if not self.computed:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump(dict(by_asset_id=self.by_asset_id, by_fingerprint=self.by_fingerprint), cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.computed = 0
+
+
+def lower_asset_id(asset_id: Tuple[str, str]) -> Tuple[str, str]:
+    # Hex is case-insensitive, so differently cased ids share a fingerprint
+    policy_id, asset_name_hex = asset_id
+    return policy_id.lower(), asset_name_hex.lower()
+
+
+_cardano_fingerprints = None
+
+
+def get_cardano_fingerprints() -> CardanoFingerprints:
+    global _cardano_fingerprints
+    if _cardano_fingerprints is None:
+        _cardano_fingerprints = CardanoFingerprints()
+    return _cardano_fingerprints
+
+
+def filter_cardano_tokens_by_price(tokens, cardano_prices):
+    # cardano_prices is keyed by token id ("<policy_id>-<asset_name_hex>")
+    token_ids = {}
+    for token_id in cardano_prices:
         if "-" not in token_id:
             continue
         policy_id, asset_name_hex = token_id.split("-")
-        fingerprint = encode_cardano_fingerprint(policy_id, asset_name_hex)
-        fingerprint_map[fingerprint] = token_id
+        token_ids[(policy_id, asset_name_hex)] = token_id
+
+    # Fingerprints of priced assets are resolved back through the reverse index
+    fingerprints = get_cardano_fingerprints()
+    fingerprints.fingerprints(token_ids)
+    token_ids = {lower_asset_id(asset_id): token_id for asset_id, token_id in token_ids.items()}
 
     filtered_tokens = []
     for token in tokens:
-        if token.address in fingerprint_map:
-            token.address = fingerprint_map[token.address]
+        asset_id = fingerprints.asset_id(token.address)
+        token_id = token_ids.get(lower_asset_id(asset_id)) if asset_id is not None else None
+        if token_id is not None:
+            token.address = token_id
             filtered_tokens.append(token)
 
     return filtered_tokens
@@ -68,15 +152,19 @@ def get_cardano_tokens_by_id(tokens, coin_list):
     # 3- the fingerprint (in hex or readable)
 
     tokens_by_id = {}
-    fingerprint_to_coin = {}
+    # Entries are kept with their position in coin_list, the later one winning
+    # when a token matches both a fingerprint and an asset id
+    coins_by_fingerprint = {}
+    coins_by_asset_id = {}
+    fingerprints = get_cardano_fingerprints()
 
-    for asset_id, coin in coin_list.items():
+    for position, (asset_id, coin) in enumerate(coin_list.items()):
         # scenario-1: as the fingerprint(hex or readable)
         if len(asset_id) < 56:
             try:
                 hrp, data = bech32.bech32_decode(asset_id)
                 if hrp == "asset":
-                    fingerprint_to_coin[asset_id] = (coin, asset_id)
+                    coins_by_fingerprint[asset_id] = (position, coin, asset_id)
                     continue
             except Exception:
                 pass
@@ -85,7 +173,7 @@ def get_cardano_tokens_by_id(tokens, coin_list):
                 fingerprint_bytes = bytes.fromhex(asset_id)
                 fingerprint_words = bech32.convertbits(fingerprint_bytes, 8, 5)
                 fingerprint = bech32.bech32_encode("asset", fingerprint_words)
-                fingerprint_to_coin[fingerprint] = (coin, fingerprint)
+                coins_by_fingerprint[fingerprint] = (position, coin, fingerprint)
                 continue
             except Exception:
                 continue  # Skip invalid entries
@@ -100,15 +188,23 @@ def get_cardano_tokens_by_id(tokens, coin_list):
             policy_id = asset_id[:56]
             asset_name_hex = asset_id[56:]
 
-        fingerprint = encode_cardano_fingerprint(policy_id, asset_name_hex)
-        asset_id = f"{policy_id}-{asset_name_hex}"
-        fingerprint_to_coin[fingerprint] = (coin, asset_id)
+        coins_by_asset_id[lower_asset_id((policy_id, asset_name_hex))] = \
+            (position, coin, (policy_id, asset_name_hex))
+
+    # Fingerprinted (or found in the cache) so that the reverse index resolves them
+    fingerprints.fingerprints(asset_id for _, _, asset_id in coins_by_asset_id.values())
 
     for token in tokens:
-        coin_to_asset = fingerprint_to_coin.get(token.address)
-        if coin_to_asset:
-            coin, asset_id = coin_to_asset
-            token.address = asset_id
+        matches = []
+        if token.address in coins_by_fingerprint:
+            matches.append(coins_by_fingerprint[token.address])
+        asset_id = fingerprints.asset_id(token.address)
+        if asset_id is not None and lower_asset_id(asset_id) in coins_by_asset_id:
+            position, coin, (policy_id, asset_name_hex) = coins_by_asset_id[lower_asset_id(asset_id)]
+            matches.append((position, coin, f"{policy_id}-{asset_name_hex}"))
+        if matches:
+            _, coin, address = max(matches, key=lambda match: match[0])
+            token.address = address
             tokens_by_id.setdefault(coin.id, []).append(token)
 
     return tokens_by_id
@@ -0,0 +1,134 @@
+import copy
+import os
+import random
+import tempfile
+import unittest
+from dataclasses import astuple
+from types import SimpleNamespace
+from unittest import mock
+
+import bech32
+
+import support  # noqa: F401
+
+import utils
+from common_classes import Token
+from utils import CardanoFingerprints, encode_cardano_fingerprint
+
+
+def recomputed_filter_cardano_tokens_by_price(tokens, cardano_prices):
+    # filter_cardano_tokens_by_price computing every fingerprint, as it did
+    # before the memoized reverse index
+    fingerprint_map = {}
+    for token_id in cardano_prices:
+        if "-" in token_id:
+            fingerprint_map[encode_cardano_fingerprint(*token_id.split("-"))] = token_id
+    filtered_tokens = []
+    for token in tokens:
+        if token.address in fingerprint_map:
+            token.address = fingerprint_map[token.address]
+            filtered_tokens.append(token)
+    return filtered_tokens
+
+
+def recomputed_get_cardano_tokens_by_id(tokens, coin_list):
+    # Likewise for get_cardano_tokens_by_id
+    fingerprint_to_coin = {}
+    for asset_id, coin in coin_list.items():
+        if len(asset_id) < 56:
+            hrp, _ = bech32.bech32_decode(asset_id)
+            if hrp == "asset":
+                fingerprint_to_coin[asset_id] = (coin, asset_id)
+                continue
+            try:
+                fingerprint = bech32.bech32_encode("asset", bech32.convertbits(bytes.fromhex(asset_id), 8, 5))
+                fingerprint_to_coin[fingerprint] = (coin, fingerprint)
+            except ValueError:
+                pass
+            continue
+        if len(asset_id) == 56:
+            policy_id, asset_name_hex = asset_id, coin.symbol.upper().encode("utf-8").hex()
+        else:
+            policy_id, asset_name_hex = asset_id[:56], asset_id[56:]
+        fingerprint_to_coin[encode_cardano_fingerprint(policy_id, asset_name_hex)] = \
+            (coin, f"{policy_id}-{asset_name_hex}")
+
+    tokens_by_id = {}
+    for token in tokens:
+        if token.address in fingerprint_to_coin:
+            coin, token.address = fingerprint_to_coin[token.address]
+            tokens_by_id.setdefault(coin.id, []).append(token)
+    return tokens_by_id
+
+
+class CardanoFingerprintsTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.path = os.path.join(cache_dir.name, "cardano-fingerprints.pickle")
+        patcher = mock.patch.object(utils, "_cardano_fingerprints", CardanoFingerprints(self.path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        rng = random.Random(0)
+        policy_ids = [rng.randbytes(28).hex() for _ in range(5)]
+        # Mixed case hex, as ids don't always come lowercased
+        self.asset_ids = [(rng.choice(policy_ids), rng.randbytes(rng.randint(0, 4)).hex())
+                          for _ in range(40)]
+        self.asset_ids += [(policy_id.upper(), name.upper()) for policy_id, name in self.asset_ids[:5]]
+
+    def token(self, address):
+        return Token(address=address, decimals=6, displaySymbol="T", logo="", name="T", symbol="T", website="")
+
+    def test_reverse_index_is_saved(self):
+        fingerprints = utils.get_cardano_fingerprints().fingerprints(self.asset_ids)
+        reloaded = CardanoFingerprints(self.path)
+        for asset_id, fingerprint in fingerprints.items():
+            self.assertEqual(fingerprint, reloaded.fingerprint(*asset_id))
+            self.assertEqual(utils.lower_asset_id(asset_id), utils.lower_asset_id(reloaded.asset_id(fingerprint)))
+        self.assertEqual(0, reloaded.computed)
+
+    def test_filter_by_price_matches_recomputed(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            priced = rng.sample(self.asset_ids, 10)
+            prices = {f"{policy_id}-{name}": 1.0 for policy_id, name in priced}
+            prices["ADA"] = 1.0
+            tokens = [self.token(encode_cardano_fingerprint(*rng.choice(self.asset_ids))) for _ in range(20)]
+            tokens.append(self.token("asset1notafingerprint"))
+
+            expected = recomputed_filter_cardano_tokens_by_price(copy.deepcopy(tokens), prices)
+            filtered = utils.filter_cardano_tokens_by_price(copy.deepcopy(tokens), prices)
+            self.assertEqual([astuple(token) for token in expected], [astuple(token) for token in filtered])
+
+    def test_tokens_by_id_matches_recomputed(self):
+        rng = random.Random(2)
+        for _ in range(50):
+            coin_list = {}
+            for i in range(15):
+                policy_id, name = rng.choice(self.asset_ids)
+                coin = SimpleNamespace(id=f"coin-{i}", symbol=rng.choice(["t", "ab"]))
+                fingerprint = encode_cardano_fingerprint(policy_id, name)
+                key = rng.choice([
+                    policy_id + name,
+                    policy_id,
+                    fingerprint,
+                    bytes(bech32.convertbits(bech32.bech32_decode(fingerprint)[1], 5, 8, False)).hex(),
+                ])
+                coin_list[key] = coin
+            addresses = [encode_cardano_fingerprint(*asset_id) for asset_id in self.asset_ids]
+            # Scenario 2 entries use the hex of the coin's uppercase symbol as the asset name
+            addresses += [encode_cardano_fingerprint(policy_id, name)
+                          for policy_id, _ in self.asset_ids for name in ["54", "4142"]]
+            tokens = [self.token(rng.choice(addresses)) for _ in range(20)]
+
+            expected = recomputed_get_cardano_tokens_by_id(copy.deepcopy(tokens), coin_list)
+            tokens_by_id = utils.get_cardano_tokens_by_id(copy.deepcopy(tokens), coin_list)
+            self.assertEqual({coin_id: [astuple(token) for token in id_tokens]
+                              for coin_id, id_tokens in expected.items()},
+                             {coin_id: [astuple(token) for token in id_tokens]
+                              for coin_id, id_tokens in tokens_by_id.items()})
+
+
+if __name__ == '__main__':
+    unittest.main()
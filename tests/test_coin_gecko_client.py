@@ -0,0 +1,115 @@
+import contextlib
+import io
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+import support  # noqa: F401
+
+from coin_gecko import CoinGeckoAPIClient, RateLimiter
+
+
+class MockCoinGecko(BaseHTTPRequestHandler):
+    # Keep-alive, so that connection reuse can be observed
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.client_address, time.monotonic()))
+            status, headers = server.responses.pop(0) if server.responses else (200, {})
+        body = json.dumps([{'id': 'bitcoin', 'current_price': 1.0}]).encode() if status == 200 else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CoinGeckoAPIClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockCoinGecko)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        # (status, headers) served in order, then 200s
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        session = requests.Session()
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v3/"
+        for name, value in [('session', session), ('BASE_URL', base_url),
+                            ('rate_limiter', RateLimiter(60_000, burst=100)), ('RETRY_BACKOFF', 0.01)]:
+            patcher = mock.patch.object(CoinGeckoAPIClient, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        CoinGeckoAPIClient.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retries_after_429_as_told(self):
+        self.server.responses = [(429, {'Retry-After': '7'})]
+        with mock.patch("coin_gecko.time.sleep") as sleep:
+            markets = CoinGeckoAPIClient.fetch_usd_markets(["bitcoin"])
+        self.assertEqual(["bitcoin"], [market.id for market in markets])
+        self.assertEqual(2, len(self.server.requests))
+        sleep.assert_called_once_with(7.0)
+
+    def test_backs_off_without_retry_after(self):
+        self.server.responses = [(503, {}), (429, {})]
+        markets = CoinGeckoAPIClient.fetch_usd_markets(["bitcoin"])
+        self.assertEqual(["bitcoin"], [market.id for market in markets])
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_gives_up_after_max_retries(self):
+        self.server.responses = [(500, {})] * (CoinGeckoAPIClient.MAX_RETRIES + 1)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual([], CoinGeckoAPIClient.fetch_usd_markets(["bitcoin"]))
+        self.assertIn("500 Server Error", output.getvalue())
+        self.assertEqual(CoinGeckoAPIClient.MAX_RETRIES + 1, len(self.server.requests))
+
+    def test_rate_limits_requests(self):
+        # 20 per second with no burst: 5 requests take at least 4 intervals
+        CoinGeckoAPIClient.rate_limiter = RateLimiter(20 * 60, burst=1)
+        CoinGeckoAPIClient.rate_limiter.tokens = 0
+        start = time.monotonic()
+        for _ in range(5):
+            CoinGeckoAPIClient.get("coins/markets", {'ids': 'bitcoin'})
+        self.assertGreaterEqual(time.monotonic() - start, 5 * 0.05 * 0.9)
+        times = [at for _, _, at in self.server.requests]
+        self.assertGreaterEqual(min(b - a for a, b in zip(times, times[1:])), 0.05 * 0.8)
+
+    def test_rate_limiter_is_shared_by_threads(self):
+        CoinGeckoAPIClient.rate_limiter = RateLimiter(50 * 60, burst=1)
+        CoinGeckoAPIClient.rate_limiter.tokens = 0
+        start = time.monotonic()
+        threads = [threading.Thread(target=CoinGeckoAPIClient.get, args=("coins/markets", {'ids': 'bitcoin'}))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(10, len(self.server.requests))
+        self.assertGreaterEqual(time.monotonic() - start, 10 * 0.02 * 0.9)
+
+    def test_reuses_connections(self):
+        for _ in range(5):
+            CoinGeckoAPIClient.get("coins/markets", {'ids': 'bitcoin'})
+        client_addresses = {client_address for _, client_address, _ in self.server.requests}
+        self.assertEqual(5, len(self.server.requests))
+        self.assertEqual(1, len(client_addresses))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import copy
+import random
+import unittest
+from dataclasses import astuple
+
+import support
+
+from common_classes import Coin, Token
+
+build_lists = support.load_script("build-lists")
+
+
+def quadratic_merge_token_lists(existing_tokens, new_tokens, coins):
+    # merge_token_lists as it was before the address and symbol indexes
+    merged_list = existing_tokens
+    existing_tokens_symbol_map = {token.symbol.lower(): True for token in existing_tokens}
+    for coin in coins:
+        existing_tokens_symbol_map[coin.symbol.lower()] = True
+
+    for new_token in new_tokens:
+        found_token_index = next((i for i, t in enumerate(merged_list)
+                                  if t.address.lower() == new_token.address.lower()), None)
+        if found_token_index is not None:
+            new_token.symbol = merged_list[found_token_index].symbol
+            merged_list[found_token_index] = new_token
+            continue
+
+        base_new_symbol = new_token.symbol
+        suffix = 2
+        while new_token.symbol.lower() in existing_tokens_symbol_map:
+            new_token.symbol = f"{base_new_symbol}{suffix}"
+            suffix += 1
+
+        existing_tokens_symbol_map[new_token.symbol.lower()] = True
+        merged_list.append(new_token)
+    return sorted(merged_list, key=lambda t: t.address)
+
+
+class MergeTokenListsTest(unittest.TestCase):
+    # Few distinct addresses and symbols, mixed case, so that lists overlap a
+    # lot and symbols collide with each other, with suffixed ones and with coins
+    ADDRESSES = ["0xaa", "0xAA", "0xbb", "0xBb", "0xcc", "0xdd", "0xee", "0xff"]
+    SYMBOLS = ["usdc", "USDC", "usdc2", "Eth", "ETH", "dai", "DAI3", "x"]
+
+    def random_token(self, rng):
+        symbol = rng.choice(self.SYMBOLS)
+        return Token(address=rng.choice(self.ADDRESSES), decimals=rng.randint(0, 18), displaySymbol=symbol,
+                     logo="", name=f"token {rng.random()}", symbol=symbol, website="")
+
+    def random_coin(self, rng):
+        symbol = rng.choice(self.SYMBOLS)
+        return Coin(symbol=symbol, displaySymbol=symbol, name=symbol, key=symbol, decimals=8, logo="", website="")
+
+    def test_matches_quadratic_merge(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            existing_tokens = [self.random_token(rng) for _ in range(rng.randint(0, 8))]
+            new_tokens = [self.random_token(rng) for _ in range(rng.randint(0, 8))]
+            coins = [self.random_coin(rng) for _ in range(rng.randint(0, 3))]
+
+            # Both versions update the tokens they're given in place
+            expected = quadratic_merge_token_lists(copy.deepcopy(existing_tokens), copy.deepcopy(new_tokens), coins)
+            merged = build_lists.merge_token_lists(copy.deepcopy(existing_tokens), copy.deepcopy(new_tokens), coins)
+            # Field by field, as Token equality only compares addresses
+            self.assertEqual([astuple(token) for token in expected], [astuple(token) for token in merged],
+                             (existing_tokens, new_tokens, coins))
+
+
+if __name__ == '__main__':
+    unittest.main()